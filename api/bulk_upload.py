@@ -0,0 +1,234 @@
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Deque, Dict, Iterable, Iterator, Optional
+
+import requests
+from urllib3.exceptions import ConnectTimeoutError, NewConnectionError
+
+from api.create_article import api_create_article
+from api.create_template import api_create_template
+
+
+# 这些状态码表示请求没有被处理（限流/服务暂不可用），退避后重试
+RETRY_STATUS = frozenset({429, 503})
+# 这些状态码可能在服务端已经处理完请求之后才返回（网关超时、后端中途出错），
+# 对创建类请求不重试，结果视为未知
+AMBIGUOUS_STATUS = frozenset({500, 502, 504})
+
+
+class WikiApiError(RuntimeError):
+	"""接口返回 200 但 status 不是 ok（业务错误，不重试）。"""
+
+	def __init__(self, resp: Dict[str, Any]) -> None:
+		super().__init__(f"接口返回失败: status={resp.get('status')!r} msg={resp.get('msg')!r}")
+		self.resp = resp
+
+
+class TokenBucket:
+	"""线程安全的令牌桶：平均每秒 rate 个请求，最多攒 capacity 个用于突发。"""
+
+	def __init__(self, rate: float, capacity: Optional[float] = None) -> None:
+		if rate <= 0:
+			raise ValueError(f"rate 必须 > 0，当前为 {rate}")
+		self.rate = rate
+		self.capacity = capacity if capacity is not None else max(1.0, rate)
+		self._tokens = self.capacity
+		self._updated = time.monotonic()
+		self._lock = threading.Lock()
+
+	def acquire(self) -> None:
+		"""取一个令牌，不够时阻塞等待。"""
+		while True:
+			with self._lock:
+				now = time.monotonic()
+				self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+				self._updated = now
+				if self._tokens >= 1:
+					self._tokens -= 1
+					return
+				wait_s = (1 - self._tokens) / self.rate
+			time.sleep(wait_s)
+
+
+def _retry_after_s(exc: BaseException) -> Optional[float]:
+	resp = getattr(exc, "response", None)
+	if resp is None:
+		return None
+	value = resp.headers.get("Retry-After")
+	try:
+		return float(value) if value is not None else None
+	except ValueError:
+		return None
+
+
+def _causes(exc: BaseException) -> Iterator[BaseException]:
+	"""异常本身及其包装链：requests 把 urllib3 的异常放在 args[0]（MaxRetryError 再放在 reason）里。"""
+	seen: set = set()
+	stack = [exc]
+	while stack:
+		e = stack.pop()
+		if id(e) in seen:
+			continue
+		seen.add(id(e))
+		yield e
+		for nxt in (getattr(e, "reason", None), e.__cause__, e.__context__, *e.args[:1]):
+			if isinstance(nxt, BaseException):
+				stack.append(nxt)
+
+
+def failed_before_send(exc: BaseException) -> bool:
+	"""连接都没建立起来（连接超时、DNS 失败、拒绝连接），请求肯定没有发出去。"""
+	if isinstance(exc, requests.ConnectTimeout):
+		return True
+	return any(isinstance(e, (ConnectTimeoutError, NewConnectionError)) for e in _causes(exc))
+
+
+def is_ambiguous(exc: BaseException) -> bool:
+	"""请求可能已经发出、但没拿到确定结果的错误（读超时、连接中断、500/502/504 等）：服务端可能已经处理。"""
+	if isinstance(exc, requests.HTTPError):
+		resp = getattr(exc, "response", None)
+		return resp is not None and resp.status_code in AMBIGUOUS_STATUS
+	if isinstance(exc, (requests.Timeout, requests.ConnectionError, requests.exceptions.ChunkedEncodingError)):
+		return not failed_before_send(exc)
+	return False
+
+
+def _is_retryable(exc: BaseException) -> bool:
+	# 只重试请求没发出去的连接错误和 429/503；读超时、"Connection aborted"、RemoteDisconnected、
+	# 500/502/504 等发生在请求发出之后，服务端可能已经处理，重发会创建重复的模板/文章
+	if isinstance(exc, requests.ConnectionError):
+		return failed_before_send(exc)
+	if isinstance(exc, requests.HTTPError):
+		resp = getattr(exc, "response", None)
+		return resp is not None and resp.status_code in RETRY_STATUS
+	return False
+
+
+class RateLimitedCaller:
+	"""限速 + 退避重试的调用器：每次尝试先从令牌桶取令牌，429/503/连接建立失败按指数退避重试。
+
+	用法：
+		caller = RateLimitedCaller(rate_per_s=2)
+		resp = caller(api_create_template, name=..., content=..., css=...)
+
+	可以在多个线程间共用，所有线程合计的请求速率不超过 rate_per_s。
+	"""
+
+	def __init__(
+		self,
+		rate_per_s: float = 2.0,
+		*,
+		burst: Optional[float] = None,
+		retries: int = 5,
+		base_delay_s: float = 1.0,
+		max_delay_s: float = 30.0,
+	) -> None:
+		self.bucket = TokenBucket(rate_per_s, burst)
+		self.retries = retries
+		self.base_delay_s = base_delay_s
+		self.max_delay_s = max_delay_s
+
+	def __call__(self, func: Callable[..., Dict[str, Any]], *args: Any, **kwargs: Any) -> Dict[str, Any]:
+		attempt = 0
+		while True:
+			attempt += 1
+			self.bucket.acquire()
+			try:
+				resp = func(*args, **kwargs)
+			except Exception as e:
+				if attempt > self.retries or not _is_retryable(e):
+					raise
+				delay = _retry_after_s(e)
+				if delay is None:
+					# 指数退避 + 抖动，避免多个线程同时重试
+					delay = min(self.max_delay_s, self.base_delay_s * 2 ** (attempt - 1))
+					delay *= 0.5 + random.random() / 2
+				time.sleep(delay)
+				continue
+			if isinstance(resp, dict) and resp.get("status") not in (None, "ok"):
+				raise WikiApiError(resp)
+			return resp
+
+
+@dataclass
+class UploadJob:
+	"""一个物品的上传任务：先建模板，成功后再发文章（article_content 为 None 则只建模板）。"""
+
+	key: str
+	template_name: str
+	template_content: str
+	css: str
+	article_title: str = ""
+	article_content: Optional[str] = None
+
+
+@dataclass
+class UploadResult:
+	"""单个物品的上传结果；failed_stage 为 "template" 或 "article"。"""
+
+	key: str
+	template_resp: Optional[Dict[str, Any]] = None
+	article_resp: Optional[Dict[str, Any]] = None
+	error: Optional[BaseException] = None
+	failed_stage: Optional[str] = None
+	elapsed_s: float = 0.0
+
+	@property
+	def ok(self) -> bool:
+		return self.error is None
+
+
+def upload_one(job: UploadJob, caller: RateLimitedCaller) -> UploadResult:
+	"""按 模板 → 文章 的顺序上传一个物品，异常记录在结果里而不是抛出。"""
+	started = time.perf_counter()
+	result = UploadResult(key=job.key)
+	stage = "template"
+	try:
+		result.template_resp = caller(
+			api_create_template,
+			name=job.template_name,
+			content=job.template_content,
+			css=job.css,
+		)
+		if job.article_content is not None:
+			stage = "article"
+			result.article_resp = caller(
+				api_create_article,
+				title=job.article_title or job.template_name,
+				content=job.article_content,
+			)
+	except Exception as e:
+		result.error = e
+		result.failed_stage = stage
+	result.elapsed_s = time.perf_counter() - started
+	return result
+
+
+def bulk_upload(
+	jobs: Iterable[UploadJob],
+	*,
+	rate_per_s: float = 2.0,
+	max_workers: int = 4,
+	retries: int = 5,
+	caller: Optional[RateLimitedCaller] = None,
+) -> Iterator[UploadResult]:
+	"""并发上传一批物品，按输入顺序逐个产出 UploadResult。
+
+	- 多个物品并发处理，但同一物品的文章一定在它的模板创建成功之后才发出；
+	- 所有线程合计的请求速率受令牌桶限制（rate_per_s），429/503 自动退避重试；
+	- 同一时刻最多挂起 max_workers * 2 个物品，jobs 可以是惰性迭代器。
+	"""
+	if caller is None:
+		caller = RateLimitedCaller(rate_per_s, retries=retries)
+	pending: Deque[Future] = deque()
+	with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="wiki-upload") as pool:
+		for job in jobs:
+			pending.append(pool.submit(upload_one, job, caller))
+			while len(pending) >= max_workers * 2:
+				yield pending.popleft().result()
+		while pending:
+			yield pending.popleft().result()
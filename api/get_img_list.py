@@ -1,9 +1,9 @@
 import json
-from typing import Any, Dict, Optional
+from typing import Any, Dict
 
 import requests
 
-from api.cookie_local import load_cookie_local
+from api.wiki_client import PLAIN_ENCODING_HEADERS, get_client
 
 
 def api_get_img_list(
@@ -27,15 +27,7 @@ def api_get_img_list(
 	_time = "1767685034"
 	nonce = "A62B142F06F2100B3D774459CFBFE0BC"
 
-	url = "https://api.xiaoheihe.cn/wiki/get_img_list/"
 	params: Dict[str, str] = {
-		"app": "heybox",
-		"heybox_id": "",
-		"os_type": "web",
-		"x_app": "heybox_website",
-		"x_client_type": "weboutapp",
-		"x_os_type": "Windows",
-		"version": "999.0.4",
 		"hkey": hkey,
 		"_time": _time,
 		"nonce": nonce,
@@ -45,33 +37,7 @@ def api_get_img_list(
 	}
 
 	# 参照现有实现：不声明 zstd，避免 requests 无法自动解压导致 resp.json() 失败。
-	headers: Dict[str, str] = {
-		"Accept": "application/json, text/plain, */*",
-		"Accept-Encoding": "gzip, deflate",
-		"Accept-Language": "zh-CN,zh;q=0.8,zh-TW;q=0.7,zh-HK;q=0.5,en-US;q=0.3,en;q=0.2",
-		"Connection": "keep-alive",
-		"Content-Type": "application/x-www-form-urlencoded;charset=UTF-8",
-		"Origin": "https://c.xiaoheihe.cn",
-		"Referer": "https://c.xiaoheihe.cn/",
-		"Sec-Fetch-Dest": "empty",
-		"Sec-Fetch-Mode": "cors",
-		"Sec-Fetch-Site": "same-site",
-		"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:146.0) Gecko/20100101 Firefox/146.0",
-	}
-
-	cookie_header: Optional[str] = load_cookie_local()
-	if cookie_header:
-		headers["Cookie"] = cookie_header
-
-	resp = requests.post(
-		url,
-		params=params,
-		data="",
-		headers=headers,
-		timeout=timeout,
-	)
-	resp.raise_for_status()
-	return resp.json()
+	return get_client().post("get_img_list", params=params, headers=PLAIN_ENCODING_HEADERS, timeout=timeout)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,204 @@
+import json
+import os
+import threading
+from typing import Any, Dict, List, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from api.cookie_local import load_cookie_local
+
+
+BASE_URL = "https://api.xiaoheihe.cn/wiki/"
+
+# 所有接口共用的 query 参数；hkey/_time/nonce 等抓包参数由各接口自己传入
+BASE_PARAMS: Dict[str, str] = {
+	"app": "heybox",
+	"heybox_id": "",
+	"os_type": "web",
+	"x_app": "heybox_website",
+	"x_client_type": "weboutapp",
+	"x_os_type": "Windows",
+	"version": "999.0.4",
+	"wiki_id": "238960",
+}
+
+DEFAULT_HEADERS: Dict[str, str] = {
+	"Accept": "application/json, text/plain, */*",
+	"Accept-Encoding": "gzip, deflate, br, zstd",
+	"Accept-Language": "zh-CN,zh;q=0.8,zh-TW;q=0.7,zh-HK;q=0.5,en-US;q=0.3,en;q=0.2",
+	"Connection": "keep-alive",
+	"Content-Type": "application/x-www-form-urlencoded;charset=UTF-8",
+	"Origin": "https://c.xiaoheihe.cn",
+	"Priority": "u=0",
+	"Referer": "https://c.xiaoheihe.cn/",
+	"Sec-Fetch-Dest": "empty",
+	"Sec-Fetch-Mode": "cors",
+	"Sec-Fetch-Site": "same-site",
+	"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:146.0) Gecko/20100101 Firefox/146.0",
+}
+
+# 不声明 br/zstd（requests 默认不支持解 zstd），列表类接口沿用抓包时的写法
+PLAIN_ENCODING_HEADERS: Dict[str, str] = {"Accept-Encoding": "gzip, deflate"}
+
+
+def decode_response(resp: requests.Response) -> Dict[str, Any]:
+	"""把接口响应解析成 JSON；requests 解不了的 zstd/br 压缩在这里手动解压。"""
+	try:
+		return resp.json()
+	except ValueError:
+		content_encoding = (resp.headers.get("Content-Encoding") or "").lower()
+		raw = resp.content
+
+		if "zstd" in content_encoding:
+			try:
+				import zstandard as zstd  # type: ignore
+			except Exception as e:
+				raise RuntimeError(
+					"服务端返回了 zstd 压缩响应，但当前环境缺少解压依赖。请先安装：pip install zstandard"
+				) from e
+			dctx = zstd.ZstdDecompressor()
+			decoded = dctx.decompress(raw)
+			return json.loads(decoded.decode("utf-8"))
+
+		if "br" in content_encoding:
+			try:
+				import brotli  # type: ignore
+			except Exception as e:
+				raise RuntimeError(
+					"服务端返回了 br 压缩响应，但当前环境缺少解压依赖。请先安装：pip install brotli"
+				) from e
+			decoded = brotli.decompress(raw)
+			return json.loads(decoded.decode("utf-8"))
+
+		raise
+
+
+# 列表接口 result 里可能承载列表的字段名（按优先级）
+_LIST_KEYS = ("list", "items", "articles", "article_list", "templates", "template_list", "imgs", "img_list")
+
+
+def result_list(payload: Dict[str, Any]) -> List[Dict[str, Any]]:
+	"""从列表接口的响应里取出记录列表。
+
+	响应一般是 {"status": "ok", "result": {...}}，列表所在字段名各接口不同：
+	优先按 _LIST_KEYS 查找，找不到就取 result 里第一个 list 字段；result 本身是 list 时直接返回。
+	"""
+	result = payload.get("result", payload)
+	if isinstance(result, list):
+		return result
+	if not isinstance(result, dict):
+		return []
+	for key in _LIST_KEYS:
+		value = result.get(key)
+		if isinstance(value, list):
+			return value
+	for value in result.values():
+		if isinstance(value, list):
+			return value
+	return []
+
+
+class WikiClient:
+	"""小黑盒 wiki 接口的共享客户端。
+
+	- 持有一个 keep-alive 的 requests.Session，连接池大小可调，批量请求复用 TCP/TLS 连接；
+	- Cookie 文件按修改时间缓存，文件更新后下一次请求自动重新读取；
+	- 统一的请求头/公共参数与响应解码（decode_response）。
+
+	api/*.py 里的各个函数都是对 get_client() 返回的共享实例的薄封装。
+	"""
+
+	def __init__(
+		self,
+		*,
+		base_url: str = BASE_URL,
+		cookie_path: str = "api/cookies.local.json",
+		pool_maxsize: int = 16,
+		timeout: float = 15,
+	) -> None:
+		self.base_url = base_url
+		self.cookie_path = cookie_path
+		self.timeout = timeout
+
+		self.session = requests.Session()
+		adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_maxsize)
+		self.session.mount("https://", adapter)
+		self.session.mount("http://", adapter)
+		self.session.headers.update(DEFAULT_HEADERS)
+
+		self._cookie_lock = threading.Lock()
+		self._cookie_mtime: Optional[float] = None
+		self._cookie_header: Optional[str] = None
+
+	def __enter__(self) -> "WikiClient":
+		return self
+
+	def __exit__(self, *exc: object) -> None:
+		self.close()
+
+	def close(self) -> None:
+		self.session.close()
+
+	def cookie_header(self) -> Optional[str]:
+		"""返回 Cookie 头；文件的 mtime 不变时直接用缓存，不存在时返回 None。"""
+		try:
+			mtime: Optional[float] = os.stat(self.cookie_path).st_mtime
+		except FileNotFoundError:
+			mtime = None
+		with self._cookie_lock:
+			if mtime != self._cookie_mtime:
+				self._cookie_header = load_cookie_local(self.cookie_path) if mtime is not None else None
+				self._cookie_mtime = mtime
+			return self._cookie_header
+
+	def post_raw(
+		self,
+		endpoint: str,
+		*,
+		params: Optional[Dict[str, str]] = None,
+		data: Any = "",
+		headers: Optional[Dict[str, str]] = None,
+		timeout: Optional[float] = None,
+	) -> requests.Response:
+		"""发 POST 并返回原始响应（非 2xx 抛 requests.HTTPError）。"""
+		merged_headers: Dict[str, str] = dict(headers or {})
+		cookie_header = self.cookie_header()
+		if cookie_header:
+			merged_headers["Cookie"] = cookie_header
+
+		resp = self.session.post(
+			self.base_url + endpoint.strip("/") + "/",
+			params={**BASE_PARAMS, **(params or {})},
+			data=data,
+			headers=merged_headers,
+			timeout=self.timeout if timeout is None else timeout,
+		)
+		resp.raise_for_status()
+		return resp
+
+	def post(
+		self,
+		endpoint: str,
+		*,
+		params: Optional[Dict[str, str]] = None,
+		data: Any = "",
+		headers: Optional[Dict[str, str]] = None,
+		timeout: Optional[float] = None,
+	) -> Dict[str, Any]:
+		"""发 POST 并把响应解码成 JSON。endpoint 形如 "create_article"。"""
+		resp = self.post_raw(endpoint, params=params, data=data, headers=headers, timeout=timeout)
+		return decode_response(resp)
+
+
+_client: Optional[WikiClient] = None
+_client_lock = threading.Lock()
+
+
+def get_client() -> WikiClient:
+	"""返回进程内共享的 WikiClient（首次调用时创建）。"""
+	global _client
+	with _client_lock:
+		if _client is None:
+			_client = WikiClient()
+		return _client
@@ -0,0 +1,114 @@
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Deque, Dict, Iterator, List
+
+from api.get_article_list import api_get_article_list
+from api.get_img_list import api_get_img_list
+from api.get_template_list import api_get_template_list
+from api.wiki_client import result_list
+
+
+def _record_key(rec: Dict[str, Any]) -> Any:
+	for key in ("id", "name", "title", "url"):
+		if key in rec:
+			return rec[key]
+	return repr(sorted(rec.items()))
+
+
+def iter_pages(
+	fetch_page: Callable[[int, int], Dict[str, Any]],
+	*,
+	page_size: int = 20,
+	prefetch: int = 1,
+) -> Iterator[Dict[str, Any]]:
+	"""按 offset/limit 逐页拉取列表接口，逐条产出记录。
+
+	- fetch_page(offset, limit) 返回接口原始响应，记录用 result_list 取出；
+	- 服务端可能把 limit 截到更小的值：第一页不满 page_size 时按它的实际条数作为步长推进 offset，
+	  不把“不满一页”当成结束（否则会漏掉后面的全部记录）；
+	- 只在拉到空页，或服务端忽略 offset 返回了与上一页相同的内容时停止，到达末尾时多发一次请求；
+	- 调用方处理当前页时，后面 prefetch 页已经在后台线程里请求（prefetch=0 则不预取），
+	  代价是到达末尾时最多多发 prefetch 个空页请求；
+	- 内存里最多同时有 1 + prefetch 页；调用方提前 break 时未取回的预取请求会被取消。
+	"""
+	if page_size <= 0:
+		raise ValueError(f"page_size 必须 > 0，当前为 {page_size}")
+	depth = max(0, prefetch) + 1
+	pending: Deque[Future] = deque()
+	next_offset = 0
+	step = page_size
+	last_keys: List[Any] = []
+
+	with ThreadPoolExecutor(max_workers=depth, thread_name_prefix="wiki-page") as pool:
+
+		def submit() -> None:
+			nonlocal next_offset
+			pending.append(pool.submit(fetch_page, next_offset, page_size))
+			next_offset += step
+
+		try:
+			# 第一页单独请求：拿到实际条数后再决定步长，之后才开始预取
+			first = result_list(fetch_page(0, page_size))
+			if not first:
+				return
+			if len(first) < page_size:
+				step = len(first)
+			next_offset = len(first)
+			last_keys = [_record_key(rec) for rec in first]
+			while len(pending) < depth:
+				submit()
+			yield from first
+			while pending:
+				page = result_list(pending.popleft().result())
+				keys = [_record_key(rec) for rec in page]
+				if not page or keys == last_keys:
+					return
+				last_keys = keys
+				# 在产出当前页之前把预取队列补满
+				while len(pending) < depth:
+					submit()
+				yield from page
+		finally:
+			for fut in pending:
+				fut.cancel()
+
+
+def iter_articles(*, page_size: int = 20, prefetch: int = 1, timeout: float = 15) -> Iterator[Dict[str, Any]]:
+	"""逐条产出 wiki 的全部文章（page_size 默认与抓包的 limit=20 一致）。"""
+	return iter_pages(
+		lambda offset, limit: api_get_article_list(offset=offset, limit=limit, timeout=timeout),
+		page_size=page_size,
+		prefetch=prefetch,
+	)
+
+
+def iter_images(*, page_size: int = 10, prefetch: int = 1, timeout: float = 15) -> Iterator[Dict[str, Any]]:
+	"""逐条产出 wiki 图片库里的全部图片（page_size 默认与抓包的 limit=10 一致）。"""
+	return iter_pages(
+		lambda offset, limit: api_get_img_list(offset=offset, limit=limit, timeout=timeout),
+		page_size=page_size,
+		prefetch=prefetch,
+	)
+
+
+def iter_templates(
+	template_type: str = "user",
+	*,
+	page_size: int = 20,
+	prefetch: int = 1,
+	timeout: float = 15,
+) -> Iterator[Dict[str, Any]]:
+	"""逐条产出指定类型的全部模板。"""
+	return iter_pages(
+		lambda offset, limit: api_get_template_list(template_type, timeout=timeout, offset=offset, limit=limit),
+		page_size=page_size,
+		prefetch=prefetch,
+	)
+
+
+if __name__ == "__main__":
+	import time
+
+	started = time.perf_counter()
+	n = sum(1 for _ in iter_articles())
+	print(f"文章 {n} 篇，用时 {time.perf_counter() - started:.1f}s")
@@ -0,0 +1,320 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+from api.bulk_upload import RateLimitedCaller
+from api.create_article import api_create_article
+from api.create_template import api_create_template
+from api.wiki_iter import iter_articles, iter_templates
+
+
+TEMPLATE = "template"
+ARTICLE = "article"
+
+CREATE = "create"
+UPDATE = "update"
+SKIP = "skip"
+
+
+def content_hash(*parts: str) -> str:
+	"""对若干段内容求 sha256（段之间用不可见分隔符，避免拼接歧义）。"""
+	return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+
+def _record_name(rec: Dict[str, Any]) -> str:
+	return str(rec.get("name") or rec.get("title") or "")
+
+
+def _record_hash(kind: str, rec: Dict[str, Any]) -> Optional[str]:
+	"""列表接口若带了正文就算出远端哈希；不带正文时返回 None（改用上次上传时记下的哈希）。"""
+	text = rec.get("text", rec.get("content"))
+	if not isinstance(text, str):
+		return None
+	if kind == TEMPLATE:
+		return content_hash(text, str(rec.get("css") or ""))
+	return content_hash(text)
+
+
+def iter_remote(kind: str, *, page_size: int = 20) -> Iterator[Dict[str, Any]]:
+	"""逐条产出远端的全部模板/文章（分页并预取下一页，见 api.wiki_iter）。"""
+	if kind == TEMPLATE:
+		return iter_templates(page_size=page_size)
+	return iter_articles(page_size=page_size)
+
+
+class WikiMirror:
+	"""远端模板/文章在本地的镜像（JSON 文件）。
+
+	每个条目记录：
+	- remote: 最近一次 refresh 时远端是否存在
+	- remote_hash: 远端列表带正文时算出的哈希
+	- synced_hash: 本工具最近一次成功上传的内容哈希
+
+	是否存在只看 remote；判断内容是否变化时优先用 remote_hash，没有再用 synced_hash。
+	差量同步（apply_sync）和流水线上传（create_if_missing）都读写这一份镜像，可以在多个线程里共用。
+	"""
+
+	def __init__(self, path: str = "tmp/wiki_mirror.json") -> None:
+		self.path = Path(path)
+		self._lock = threading.RLock()
+		self.data: Dict[str, Any] = {TEMPLATE: {}, ARTICLE: {}, "refreshed_at": None}
+		if self.path.exists():
+			loaded = json.loads(self.path.read_text(encoding="utf-8"))
+			if isinstance(loaded, dict):
+				self.data.update(loaded)
+
+	def save(self) -> None:
+		with self._lock:
+			self.path.parent.mkdir(parents=True, exist_ok=True)
+			tmp = self.path.with_name(self.path.name + ".tmp")
+			tmp.write_text(json.dumps(self.data, ensure_ascii=False, indent=1), encoding="utf-8")
+			os.replace(tmp, self.path)
+
+	def _entry(self, kind: str, name: str) -> Dict[str, Any]:
+		return self.data[kind].setdefault(name, {"remote": False, "remote_hash": None, "synced_hash": None})
+
+	def refresh(self, *, page_size: int = 20) -> Dict[str, int]:
+		"""分页拉取远端列表更新镜像，返回 {kind: 远端条目数}。"""
+		counts: Dict[str, int] = {}
+		for kind in (TEMPLATE, ARTICLE):
+			for entry in self.data[kind].values():
+				entry["remote"] = False
+			n = 0
+			for rec in iter_remote(kind, page_size=page_size):
+				name = _record_name(rec)
+				if not name:
+					continue
+				entry = self._entry(kind, name)
+				entry["remote"] = True
+				entry["remote_hash"] = _record_hash(kind, rec)
+				n += 1
+			counts[kind] = n
+		self.data["refreshed_at"] = time.time()
+		self.save()
+		return counts
+
+	def exists(self, kind: str, name: str) -> bool:
+		# 只看 remote：上传成功时置为 True，refresh 发现远端已删除时置为 False（需要重新创建）
+		entry = self.data[kind].get(name)
+		return bool(entry and entry["remote"])
+
+	def known_hash(self, kind: str, name: str) -> Optional[str]:
+		entry = self.data[kind].get(name)
+		if not entry:
+			return None
+		return entry["remote_hash"] or entry["synced_hash"]
+
+	def record_upload(self, kind: str, name: str, digest: str) -> None:
+		with self._lock:
+			entry = self._entry(kind, name)
+			entry["remote"] = True
+			entry["remote_hash"] = None
+			entry["synced_hash"] = digest
+
+
+@dataclass
+class SyncItem:
+	"""一个物品在本地渲染出的模板与文章内容；template_content 为 None 时该物品没有自己的模板
+	（参数化模板模式，文章直接带参数调用共用模板）。"""
+
+	name: str
+	template_content: Optional[str]
+	css: str
+	article_content: str
+	article_title: str = ""
+
+
+@dataclass(frozen=True)
+class SyncTemplate:
+	"""与具体物品无关的共用模板（基础样式、参数化弹窗模板等）。"""
+
+	name: str
+	content: str
+	css: str = ""
+
+
+@dataclass(frozen=True)
+class SharedStyle:
+	"""所有物品模板共用的样式表，单独发布为一个只带 CSS 的基础模板。
+
+	模板名固定（文章里按名字引用），版本为 CSS 的内容哈希：CSS 改动后只需更新这一个模板，
+	各物品模板的内容不变。目前没有 update 接口，CSS 改动只会报告为 update，需 force_update 才会覆盖。
+	"""
+
+	name: str
+	css: str
+
+	@property
+	def version(self) -> str:
+		return content_hash(self.css)[:12]
+
+	@property
+	def template_content(self) -> str:
+		# 基础模板本身不显示内容，只带一个版本标记
+		return f'<span hidden data-style="{self.name}" data-version="{self.version}"></span>'
+
+	def include(self) -> str:
+		"""页面里引用基础模板的写法。"""
+		return "{{pre|" + self.name + "}}"
+
+	def as_template(self) -> SyncTemplate:
+		return SyncTemplate(self.name, self.template_content, self.css)
+
+
+@dataclass
+class SyncEntry:
+	kind: str
+	name: str
+	action: str
+	digest: str
+	payload: Dict[str, Any] = field(repr=False)
+
+
+@dataclass
+class SyncPlan:
+	"""同步计划：每个物品依次是模板、文章两条，保证文章排在自己的模板之后。"""
+
+	entries: List[SyncEntry] = field(default_factory=list)
+
+	def count(self, kind: str, action: str) -> int:
+		return sum(1 for e in self.entries if e.kind == kind and e.action == action)
+
+	@property
+	def pending(self) -> List[SyncEntry]:
+		return [e for e in self.entries if e.action != SKIP]
+
+	def report(self, *, limit: int = 20) -> str:
+		"""生成 dry-run 报告：各类计数 + 前 limit 条待上传的条目。"""
+		lines = []
+		for kind in (TEMPLATE, ARTICLE):
+			lines.append(
+				f"{kind}: create={self.count(kind, CREATE)} update={self.count(kind, UPDATE)} "
+				f"skip={self.count(kind, SKIP)}"
+			)
+		if self.count(TEMPLATE, UPDATE) or self.count(ARTICLE, UPDATE):
+			lines.append("  （还没有 update 接口：update 条目默认不上传，--force-update 才会用 create 覆盖同名条目）")
+		pending = self.pending
+		for e in pending[:limit]:
+			lines.append(f"  {e.action:<6} {e.kind:<8} {e.name}")
+		if len(pending) > limit:
+			lines.append(f"  ... 其余 {len(pending) - limit} 条")
+		return "\n".join(lines)
+
+
+def _action(mirror: WikiMirror, kind: str, name: str, digest: str) -> str:
+	if not mirror.exists(kind, name):
+		return CREATE
+	if mirror.known_hash(kind, name) == digest:
+		return SKIP
+	return UPDATE
+
+
+def create_if_missing(
+	mirror: WikiMirror,
+	kind: str,
+	name: str,
+	digest: str,
+	upload: Callable[[], Dict[str, Any]],
+	*,
+	force_update: bool = False,
+) -> Dict[str, Any]:
+	"""远端没有同名条目时才调用 upload（create_* 接口），成功后写回镜像。
+
+	同名条目已存在：内容一致直接跳过；内容不同时，因为还没有 update 接口、再发 create 会在远端重复创建，
+	默认也跳过并在返回值里标明 {"skipped": "update"}，force_update=True 才照样调用 upload。
+	"""
+	action = _action(mirror, kind, name, digest)
+	if action == SKIP or (action == UPDATE and not force_update):
+		return {"status": "ok", "skipped": action}
+	resp = upload()
+	mirror.record_upload(kind, name, digest)
+	mirror.save()
+	return resp
+
+
+def plan_sync(
+	items: Iterable[SyncItem],
+	mirror: WikiMirror,
+	*,
+	shared_style: Optional[SharedStyle] = None,
+	base_templates: Iterable[SyncTemplate] = (),
+) -> SyncPlan:
+	"""对比本地渲染结果与镜像，只把新增/变化的模板与文章放进计划。
+
+	传入 shared_style 时，计划的第一条是共用样式的基础模板（CSS 变了才上传）；
+	此时各物品的 SyncItem.css 应为空串，由文章引用基础模板。
+	base_templates（如参数化弹窗模板）排在物品之前，同样只在内容变化时上传。
+	"""
+	plan = SyncPlan()
+	shared = [shared_style.as_template()] if shared_style is not None else []
+	for t in (*shared, *base_templates):
+		digest = content_hash(t.content, t.css)
+		plan.entries.append(SyncEntry(
+			kind=TEMPLATE,
+			name=t.name,
+			action=_action(mirror, TEMPLATE, t.name, digest),
+			digest=digest,
+			payload={"name": t.name, "content": t.content, "css": t.css},
+		))
+	for item in items:
+		title = item.article_title or item.name
+		candidates = []
+		if item.template_content is not None:
+			candidates.append((TEMPLATE, item.name, content_hash(item.template_content, item.css),
+				{"name": item.name, "content": item.template_content, "css": item.css}))
+		candidates.append((ARTICLE, title, content_hash(item.article_content),
+			{"title": title, "content": item.article_content}))
+		for kind, name, digest, payload in candidates:
+			plan.entries.append(SyncEntry(
+				kind=kind, name=name, action=_action(mirror, kind, name, digest), digest=digest, payload=payload
+			))
+	return plan
+
+
+def apply_sync(
+	plan: SyncPlan,
+	mirror: WikiMirror,
+	*,
+	caller: Optional[RateLimitedCaller] = None,
+	dry_run: bool = False,
+	force_update: bool = False,
+	upload_template: Callable[..., Dict[str, Any]] = api_create_template,
+	upload_article: Callable[..., Dict[str, Any]] = api_create_article,
+) -> List[Dict[str, Any]]:
+	"""按计划上传（跳过 skip），每成功一条就写回镜像；返回每条的结果。
+
+	目前只抓到 create_* 接口：对已存在的同名条目再发 create 会重复创建，所以 update 条目默认只报告、
+	不上传，force_update=True 才用 create_* 覆盖；抓到 update 接口后通过 upload_template/upload_article
+	参数替换即可。某物品的模板上传失败时，跳过它的文章。
+	"""
+	if caller is None:
+		caller = RateLimitedCaller()
+	results: List[Dict[str, Any]] = []
+	failed_templates: set = set()
+	for e in plan.pending:
+		if dry_run:
+			results.append({"kind": e.kind, "name": e.name, "action": e.action, "dry_run": True})
+			continue
+		if e.action == UPDATE and not force_update:
+			results.append({"kind": e.kind, "name": e.name, "action": e.action, "skipped": UPDATE})
+			continue
+		if e.kind == ARTICLE and e.payload["title"] in failed_templates:
+			results.append({"kind": e.kind, "name": e.name, "action": e.action, "error": "模板上传失败，跳过"})
+			continue
+		func = upload_template if e.kind == TEMPLATE else upload_article
+		try:
+			resp = caller(func, **e.payload)
+		except Exception as exc:
+			if e.kind == TEMPLATE:
+				failed_templates.add(e.name)
+			results.append({"kind": e.kind, "name": e.name, "action": e.action, "error": repr(exc)})
+			continue
+		mirror.record_upload(e.kind, e.name, e.digest)
+		mirror.save()
+		results.append({"kind": e.kind, "name": e.name, "action": e.action, "resp": resp})
+	return results
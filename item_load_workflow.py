@@ -1,14 +1,27 @@
+import argparse
 import json
 import os
-from typing import Any
+import time
+from typing import Any, Iterable
 import re
 
 import tool.fetch_poedb_item_popup
-import tool.render_template
+from tool.minify import MinifyStats, minify_css, minify_html
+from tool.render_template import ItemPopupRenderer
 import tool.download_pic
-import tool.webp_to_png
 import api.create_template
 import api.create_article
+from api.bulk_upload import RateLimitedCaller, is_ambiguous
+from api.wiki_sync import (
+    ARTICLE, TEMPLATE, UPDATE, SharedStyle, SyncItem, SyncTemplate, WikiMirror, apply_sync, content_hash,
+    create_if_missing, plan_sync,
+)
+from tool.checkpoint_journal import CheckpointJournal
+from tool.item_store import ItemPopup, ItemStore
+from tool.poedb_cache import PoedbHtmlCache
+from tool.poedb_index import load_index
+from tool.webp_to_png import PngOptions
+from tool.pipeline import Pipeline, Stage
 
 def json_to_list(json_path, encoding: str = "utf-8") -> list[Any]:
     """读取 JSON 列表文件。"""
@@ -26,55 +39,341 @@ def convert_poedb_img(url: str) -> str:
     name = m.group(1)
     return f"https://cdn.max-c.com/wiki/238960/{name}.png?v=1"
 
-if __name__ == "__main__":
-    
-    temp_list = []
-    # 读取poedb所有条目
-    data = json_to_list("data/20260106poedb.json")
-    for x in data:
-        if x.get("desc") == "可堆叠通货":
-            temp_list.append(x)
-    _l = temp_list[12:]
-    # 遍历目标列表
-    for item in _l:
-        # 获取poedb物品信息
-        o = tool.fetch_poedb_item_popup.fetch_poedb_item_lines(f"https://poedb.tw/cn/{item['value']}")
-        print(o)
-        # 渲染HTML
-        out = tool.render_template.render_item_popup(
-            "template/Item/item_popup.html",
-            title=f"{o[0]}",
-            category=f"{o[1]}",
-            stack=f"{o[3]}",
-            affix=f"{o[-4]}",
-            desc_html=f"{o[-3]}",
-            en=f"{o[-2]}",
-            icon_url=convert_poedb_img(o[-1]),
-            out_path=f"tmp/{o[-2]}.html",
+# 共用样式基础模板的名字（--shared-css 模式）
+SHARED_STYLE_NAME = "物品弹窗样式"
+# 参数化弹窗模板的名字（--param-template 模式）
+POPUP_TEMPLATE_NAME = "物品弹窗"
+
+def article_content(title: str, shared_style: SharedStyle | None = None, *, call: str | None = None) -> str:
+    """物品文章正文：默认引用同名模板，call 可替换为带参数的模板调用；共用样式模式下先引用样式基础模板。"""
+    style = shared_style.include() if shared_style is not None else ""
+    if call is None:
+        call = "{{pre|"+ title + "}}"
+    return "<p><br></p>" + style + call + "\n<p><br></p>\n<p><br></p>\n<p><br></p>"
+
+def _template_arg(value: str) -> str:
+    # 参数值里的 | 和 {{ }} 会截断模板调用，换成等价的 HTML 实体
+    return value.replace("|", "&#124;").replace("{{", "&#123;&#123;").replace("}}", "&#125;&#125;")
+
+def popup_call(popup: ItemPopup) -> str:
+    """参数化模板的调用：{{pre|物品弹窗|title=...|category=...|...}}。"""
+    args = {
+        "title": popup.title,
+        "category": popup.category,
+        "stack": popup.stack,
+        "affix": popup.affix,
+        "desc_html": popup.desc,
+        "en": popup.en,
+        "icon_url": convert_poedb_img(popup.image_src),
+    }
+    return "{{pre|" + POPUP_TEMPLATE_NAME + "".join(f"|{k}={_template_arg(v)}" for k, v in args.items()) + "}}"
+
+def popup_template(renderer: ItemPopupRenderer, shared_style: SharedStyle | None = None) -> SyncTemplate:
+    """整个目录共用的参数化弹窗模板（占位符换成 {{{title}}} 这类模板参数）。"""
+    return SyncTemplate(
+        POPUP_TEMPLATE_NAME,
+        minify_html(renderer.parameterized()),
+        "" if shared_style is not None else minify_css(renderer.css()),
+    )
+
+def render_popup(renderer: ItemPopupRenderer, popup: ItemPopup) -> str:
+    """在内存里把物品渲染成模板 HTML。"""
+    return renderer.render(
+        title=popup.title,
+        category=popup.category,
+        stack=popup.stack,
+        affix=popup.affix,
+        desc_html=popup.desc,
+        en=popup.en,
+        icon_url=convert_poedb_img(popup.image_src),
+    )
+
+def build_item_stages(
+    fetcher: tool.fetch_poedb_item_popup.PoedbFetcher,
+    renderer: ItemPopupRenderer,
+    journal: CheckpointJournal,
+    store: ItemStore,
+    caller: RateLimitedCaller,
+    minify_stats: MinifyStats,
+    shared_style: SharedStyle | None = None,
+    param_template: bool = False,
+    max_age_s: float | None = None,
+    mirror: WikiMirror | None = None,
+    force_update: bool = False,
+    png_options: PngOptions | None = None,
+) -> list[Stage]:
+    """构造 抓取 → 渲染 → 压缩 → 下载并转 PNG → 上传模板 → 发布文章 的流水线阶段。
+
+    每个阶段接收并返回同一个 dict（ctx），依次补充 popup/rendered/png 等字段。
+    抓取和下载是网络请求，开多线程；上传也并发，但合计速率受 caller 的令牌桶限制，
+    429/503 自动退避重试（500/502/504 结果未知，journal 保持 pending）；
+    同一物品的文章一定在模板之后发出（文章阶段在模板阶段之后）。
+    抓取结果存入 store，已抓过且不超过 max_age_s 的物品直接从本地读取（None 表示不过期，
+    fetcher.force_refresh 时一律重新抓取）；其余阶段的输出按 poedb value
+    记入 journal，重跑时已完成的阶段直接复用，上传类阶段不会重复提交。
+    传入 shared_style 时，各物品模板不再带 CSS，样式由文章引用的基础模板提供
+    （基础模板用 publish_base_template 先发布）。
+    param_template=True 时不再给每个物品建模板，文章直接带参数调用共用的参数化模板
+    （同样先用 publish_base_template 发布），每个物品只剩一次上传。
+    上传前后都查/写 mirror（与 --sync 共用同一份镜像）：远端已有同名模板/文章就不再 create，
+    内容不同也只在 force_update=True 时才覆盖（见 create_if_missing）。
+    png_options 默认为无损最大压缩；调色板量化有损，需显式传入（如 PngOptions.optimized()）。
+    """
+    if mirror is None:
+        mirror = WikiMirror()
+    if png_options is None:
+        png_options = PngOptions(optimize=True, measure=True)
+
+    def fetch(ctx: dict[str, Any]) -> dict[str, Any]:
+        # 获取poedb物品信息（本地仓库里已有且未过期就不再抓取）
+        popup = None if fetcher.force_refresh else store.get(ctx["item"]["value"])
+        if popup is not None and max_age_s is not None and time.time() - popup.fetched_at > max_age_s:
+            popup = None
+        if popup is None:
+            popup = fetcher.fetch_item(ctx["url"])
+            store.put(popup)
+            print(popup)
+        ctx["popup"] = popup
+        return ctx
+
+    def render(ctx: dict[str, Any]) -> dict[str, Any]:
+        # 纯内存渲染（模板已编译缓存），不落盘也不记 journal
+        ctx["rendered"] = render_popup(renderer, ctx["popup"])
+        return ctx
+
+    def minify(ctx: dict[str, Any]) -> dict[str, Any]:
+        # 上传前去掉注释和缩进，模板在 wiki 上存几百份，省下的字节每个读者都受益
+        ctx["rendered"] = minify_stats.add("html", ctx["rendered"], minify_html(ctx["rendered"]))
+        return ctx
+
+    # 下载阶段的线程共用一个连接池
+    download_session = tool.download_pic.make_session(pool_maxsize=4)
+
+    def download_png(ctx: dict[str, Any]) -> str:
+        # 下载后直接在内存里转 PNG，不再落地中间的 webp
+        # 图标会被每个 wiki 读者加载：默认无损最大压缩，--quantize 时才尝试误差可控的调色板量化
+        t = tool.download_pic.download_image_as_png(
+            ctx["popup"].image_src,
+            "tmp/images/png",
+            session=download_session,
+            png_options=png_options,
         )
-        
-        # 下载图片
-        t = tool.download_pic.download_image(o[-1],"tmp/images/webp")
         print(t)
+        return t
 
-        # 转换图片
-        _t = tool.webp_to_png.convert_webp_to_png(t,"tmp/images/png")
-
-        # 读取CSS
-        cs = open("template/Item/item_popup.css","r",encoding="utf-8").read()
-        _out = open(out,"r",encoding="utf-8").read()
+    def upload_template(ctx: dict[str, Any]) -> dict[str, Any]:
+        name = ctx["popup"].title
+        css = "" if shared_style is not None else minify_stats.add("css", renderer.css(), minify_css(renderer.css()))
+        return create_if_missing(
+            mirror, TEMPLATE, name, content_hash(ctx["rendered"], css),
+            lambda: caller(api.create_template.api_create_template, name=name, content=ctx["rendered"], css=css),
+            force_update=force_update,
+        )
 
-        # 上传模板
-        api.create_template.api_create_template(
-            name=f"{o[0]}",
-            content=_out,
-            css=cs,
+    def publish_article(ctx: dict[str, Any]) -> dict[str, Any]:
+        popup: ItemPopup = ctx["popup"]
+        call = popup_call(popup) if param_template else None
+        content = article_content(popup.title, shared_style, call=call)
+        return create_if_missing(
+            mirror, ARTICLE, popup.title, content_hash(content),
+            lambda: caller(api.create_article.api_create_article, title=popup.title, content=content),
+            force_update=force_update,
         )
 
-        # 发布文章
-        api.create_article.api_create_article(
-            title=f"{o[0]}",
-            content="<p><br></p>{{pre|"+ o[0] + "}}\n<p><br></p>\n<p><br></p>\n<p><br></p>",
+    def step(name: str, field: str, func: Any, *, workers: int = 1, idempotent: bool = True) -> Stage:
+        def run(ctx: dict[str, Any]) -> dict[str, Any]:
+            # 上传读超时/连接中断时服务端可能已经创建，journal 保持 pending，不在下次运行时重发
+            ctx[field] = journal.run(
+                ctx["item"]["value"], name, lambda: func(ctx), idempotent=idempotent, ambiguous=is_ambiguous
+            )
+            return ctx
+        return Stage(name, run, workers=workers)
+
+    if param_template:
+        return [
+            Stage("fetch", fetch, workers=fetcher.concurrency),
+            step("image", "png", download_png, workers=4),
+            step("article", "article_resp", publish_article, workers=4, idempotent=False),
+        ]
+    return [
+        Stage("fetch", fetch, workers=fetcher.concurrency),
+        Stage("render", render),
+        Stage("minify", minify),
+        step("image", "png", download_png, workers=4),
+        step("template", "template_resp", upload_template, workers=4, idempotent=False),
+        step("article", "article_resp", publish_article, workers=4, idempotent=False),
+    ]
+
+
+def publish_base_template(
+    template: SyncTemplate,
+    journal: CheckpointJournal,
+    caller: RateLimitedCaller,
+    mirror: WikiMirror,
+    *,
+    force_update: bool = False,
+) -> dict[str, Any]:
+    """发布共用模板（样式基础模板/参数化弹窗模板）；journal 按内容哈希记录，同一版本只上传一次。
+
+    远端已有同名模板时不再 create（内容变了只报告，force_update=True 才覆盖），见 create_if_missing。
+    """
+    digest = content_hash(template.content, template.css)
+    resp = journal.run(
+        "__base_template__",
+        f"{template.name}-{digest[:12]}",
+        lambda: create_if_missing(
+            mirror, TEMPLATE, template.name, digest,
+            lambda: caller(
+                api.create_template.api_create_template,
+                name=template.name,
+                content=template.content,
+                css=template.css,
+            ),
+            force_update=force_update,
+        ),
+        idempotent=False,
+        ambiguous=is_ambiguous,
+    )
+    if isinstance(resp, dict) and resp.get("skipped") == UPDATE:
+        print(f"共用模板 {template.name} 内容有变化，但还没有 update 接口，未上传（--sync --force-update 可覆盖）")
+    return resp
+
+
+def reset_journal(journal: CheckpointJournal, specs: Iterable[str]) -> None:
+    """按 "VALUE" 或 "VALUE:STAGE" 清掉 journal 记录（核对过远端后，让停在 pending 的上传重新执行）。"""
+    for spec in specs:
+        value, sep, stage = spec.rpartition(":")
+        if not sep:
+            value, stage = spec, ""
+        journal.reset(value, stage or None)
+        print("已重置:", value, stage or "(全部阶段)")
+
+
+def sync_items(
+    popups: Iterable[ItemPopup],
+    renderer: ItemPopupRenderer,
+    mirror: WikiMirror,
+    caller: RateLimitedCaller,
+    *,
+    dry_run: bool = False,
+    force_update: bool = False,
+    shared_style: SharedStyle | None = None,
+    param_template: bool = False,
+) -> list[dict[str, Any]]:
+    """从本地仓库渲染全部物品，与远端镜像比对后只上传新增/变化的模板和文章。"""
+
+    def to_sync_item(popup: ItemPopup) -> SyncItem:
+        if param_template:
+            return SyncItem(
+                name=popup.title,
+                template_content=None,
+                css="",
+                article_content=article_content(popup.title, shared_style, call=popup_call(popup)),
+            )
+        return SyncItem(
+            name=popup.title,
+            template_content=minify_html(render_popup(renderer, popup)),
+            css="" if shared_style is not None else minify_css(renderer.css()),
+            article_content=article_content(popup.title, shared_style),
         )
 
+    base_templates = [popup_template(renderer, shared_style)] if param_template else []
+    plan = plan_sync(
+        (to_sync_item(p) for p in popups), mirror, shared_style=shared_style, base_templates=base_templates
+    )
+    print(plan.report())
+    return apply_sync(plan, mirror, caller=caller, dry_run=dry_run, force_update=force_update)
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="POEDB 物品 → 小黑盒 wiki 模板/文章")
+    arg_parser.add_argument("--sync", action="store_true", help="只用本地仓库里的物品做差量同步，不抓取")
+    arg_parser.add_argument("--dry-run", action="store_true", help="配合 --sync：只打印计划，不上传")
+    arg_parser.add_argument("--no-refresh", action="store_true", help="配合 --sync：不拉远端列表，只用本地镜像")
+    arg_parser.add_argument("--shared-css", action="store_true", help="CSS 只发布一次为基础模板，物品模板不再各带一份")
+    arg_parser.add_argument(
+        "--param-template", action="store_true", help="只发布一个参数化弹窗模板，文章带参数调用它（每个物品少一次上传）"
+    )
+    arg_parser.add_argument(
+        "--force-update", action="store_true",
+        help="内容有变化的已有模板/文章也用 create 接口重新提交（还没有 update 接口，远端可能出现重复条目）",
+    )
+    arg_parser.add_argument(
+        "--quantize", type=int, default=0, metavar="N",
+        help="图标尝试量化为 N 色调色板（有损，误差超过阈值的图标保持无损；默认不量化）",
+    )
+    arg_parser.add_argument(
+        "--refresh", action="store_true",
+        help="忽略物品仓库和 HTML 缓存，全部重新抓取 poedb（已完成的上传不会重发，内容变化用 --sync --force-update 同步）",
+    )
+    arg_parser.add_argument(
+        "--reset", action="append", default=[], metavar="VALUE[:STAGE]",
+        help="先清掉该物品（或其某个阶段，如 template/article）的断点记录再运行，可重复；"
+             "用于核对远端后重试停在 pending 的上传",
+    )
+    args = arg_parser.parse_args()
+
+    # poedb 条目走预建索引（源 JSON 更新后自动重建），不再每次解析整个 JSON 再线性筛选
+    temp_list = load_index("data/20260106poedb.json").query(desc="可堆叠通货")
+
+    # 模板/CSS 只读取编译一次，文件修改后自动重新加载
+    renderer = ItemPopupRenderer("template/Item/item_popup.html", "template/Item/item_popup.css")
+    shared_style = SharedStyle(SHARED_STYLE_NAME, minify_css(renderer.css())) if args.shared_css else None
+
+    # 断点日志：中断后直接重跑即可，已完成的阶段自动跳过，失败的阶段重试
+    # 物品仓库：抓取过的物品结构化保存，渲染/上传可以直接批量复用
+    # 远端镜像：--sync 与普通流水线共用，谁上传过的条目另一边都不会再 create
+    mirror = WikiMirror("tmp/wiki_mirror.json")
+    if args.sync:
+        # 差量同步：渲染结果与远端镜像的内容哈希一致的条目直接跳过
+        values = {x["value"] for x in temp_list}
+        if not args.no_refresh:
+            print("远端条目数:", mirror.refresh())
+        with ItemStore("tmp/items.sqlite3") as store:
+            popups = (p for p in store.iter_items() if p.value in values)
+            results = sync_items(
+                popups, renderer, mirror, RateLimitedCaller(rate_per_s=2),
+                dry_run=args.dry_run, force_update=args.force_update,
+                shared_style=shared_style, param_template=args.param_template,
+            )
+        for r in results:
+            if "error" in r:
+                print(f"失败[{r['kind']}]:", r["name"], r["error"])
+        skipped = sum(1 for r in results if r.get("skipped") == UPDATE)
+        if skipped:
+            print(f"{skipped} 条有变化的已有条目未上传（没有 update 接口，确认后加 --force-update 覆盖）")
+        raise SystemExit(0)
 
+    with CheckpointJournal("tmp/workflow_journal.sqlite3") as journal, ItemStore("tmp/items.sqlite3") as store:
+        reset_journal(journal, args.reset)
+        # 各阶段并发执行，阶段之间有界队列背压，内存不随条目数增长
+        # poedb 页面走本地缓存：模板/CSS 调整后重新渲染不需要再开浏览器
+        # 仓库里的物品与 HTML 缓存用同一个有效期，过期的物品会真正重新抓取
+        with PoedbHtmlCache("tmp/poedb_cache", ttl_s=7 * 24 * 3600) as cache, \
+                tool.fetch_poedb_item_popup.PoedbFetcher(
+                    concurrency=4, cache=cache, fast=True, http_first=True, popup_only=True,
+                    force_refresh=args.refresh,
+                ) as fetcher:
+            minify_stats = MinifyStats()
+            caller = RateLimitedCaller(rate_per_s=2)
+            if shared_style is not None:
+                publish_base_template(
+                    shared_style.as_template(), journal, caller, mirror, force_update=args.force_update
+                )
+            if args.param_template:
+                publish_base_template(
+                    popup_template(renderer, shared_style), journal, caller, mirror, force_update=args.force_update
+                )
+            pipeline = Pipeline(build_item_stages(
+                fetcher, renderer, journal, store, caller, minify_stats, shared_style, args.param_template,
+                max_age_s=cache.ttl_s, mirror=mirror, force_update=args.force_update,
+                png_options=PngOptions.optimized(quantize_colors=args.quantize) if args.quantize > 0 else None,
+            ))
+            items = ({"item": item, "url": f"https://poedb.tw/cn/{item['value']}"} for item in temp_list)
+            for r in pipeline.run(items):
+                if not r.ok:
+                    print(f"失败[{r.failed_stage}]:", r.item["url"], r.error)
+            print(minify_stats.summary())
+        print(journal.summary())
+        for value, stage, error in journal.pending():
+            print(f"待核对[{stage}]:", value, error, f"（核对远端后用 --reset {value}:{stage} 重试）")
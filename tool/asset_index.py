@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional, Union
+
+
+PathLike = Union[str, os.PathLike]
+
+
+@dataclass(frozen=True)
+class AssetRecord:
+	"""一个已下载的远程资源：来源 URL、内容哈希、本地路径与缓存校验头。
+
+	options 为生成本地文件时的转换参数（如 PNG 压缩/量化设置），原样保存的下载为空串。
+	"""
+
+	url: str
+	sha256: str
+	path: str
+	etag: str
+	last_modified: str
+	checked_at: float
+	options: str = ""
+
+	@property
+	def age_s(self) -> float:
+		return time.time() - self.checked_at
+
+	def exists(self) -> bool:
+		return Path(self.path).is_file()
+
+
+def sha256_file(path: PathLike, chunk_size: int = 256 * 1024) -> str:
+	h = hashlib.sha256()
+	with open(path, "rb") as f:
+		for chunk in iter(lambda: f.read(chunk_size), b""):
+			h.update(chunk)
+	return h.hexdigest()
+
+
+class AssetIndex:
+	"""下载资源的本地索引（SQLite），按来源 URL 和内容哈希两个维度记录。
+
+	- assets: url → sha256/本地路径/ETag/Last-Modified/最近校验时间，用于跳过下载或发条件请求；
+	- blobs: sha256 → 本地路径，内容相同的文件只保存一份，不同 URL 指向同一个文件。
+
+	线程安全，可在多个下载线程里共用。
+	"""
+
+	def __init__(self, db_path: PathLike = "tmp/images/assets.sqlite3") -> None:
+		self.db_path = Path(db_path)
+		self.db_path.parent.mkdir(parents=True, exist_ok=True)
+		# 对外开放：下载时“查重 + 落盘 + 登记”需要在同一把锁里完成
+		self.lock = threading.RLock()
+		self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+		self._conn.execute("PRAGMA journal_mode=WAL")
+		self._conn.executescript(
+			"""
+			CREATE TABLE IF NOT EXISTS assets (
+				url           TEXT PRIMARY KEY,
+				sha256        TEXT NOT NULL,
+				path          TEXT NOT NULL,
+				etag          TEXT NOT NULL DEFAULT '',
+				last_modified TEXT NOT NULL DEFAULT '',
+				checked_at    REAL NOT NULL,
+				options       TEXT NOT NULL DEFAULT ''
+			);
+			CREATE TABLE IF NOT EXISTS blobs (
+				sha256 TEXT PRIMARY KEY,
+				path   TEXT NOT NULL,
+				size   INTEGER NOT NULL
+			);
+			"""
+		)
+		columns = {row[1] for row in self._conn.execute("PRAGMA table_info(assets)")}
+		if "options" not in columns:
+			# 旧索引没有 options 列：补上，旧记录视为“原样保存”
+			self._conn.execute("ALTER TABLE assets ADD COLUMN options TEXT NOT NULL DEFAULT ''")
+		self._conn.commit()
+
+	def __enter__(self) -> "AssetIndex":
+		return self
+
+	def __exit__(self, *exc: object) -> None:
+		self.close()
+
+	def close(self) -> None:
+		with self.lock:
+			self._conn.close()
+
+	def lookup(self, url: str) -> Optional[AssetRecord]:
+		with self.lock:
+			row = self._conn.execute(
+				"SELECT url, sha256, path, etag, last_modified, checked_at, options FROM assets WHERE url = ?", (url,)
+			).fetchone()
+		return None if row is None else AssetRecord(*row)
+
+	def blob_path(self, sha256: str) -> Optional[str]:
+		"""返回该内容已保存的文件路径；文件已被删掉时清理记录并返回 None。"""
+		with self.lock:
+			row = self._conn.execute("SELECT path FROM blobs WHERE sha256 = ?", (sha256,)).fetchone()
+			if row is None:
+				return None
+			if not Path(row[0]).is_file():
+				self._conn.execute("DELETE FROM blobs WHERE sha256 = ?", (sha256,))
+				self._conn.commit()
+				return None
+			return row[0]
+
+	def record(
+		self,
+		url: str,
+		*,
+		sha256: str,
+		path: PathLike,
+		etag: str = "",
+		last_modified: str = "",
+		options: str = "",
+	) -> AssetRecord:
+		"""登记（或更新）一次下载结果，同时登记内容哈希 → 文件。"""
+		path = str(Path(path).resolve())
+		now = time.time()
+		with self.lock:
+			self._conn.execute(
+				"INSERT OR IGNORE INTO blobs (sha256, path, size) VALUES (?, ?, ?)",
+				(sha256, path, Path(path).stat().st_size),
+			)
+			self._conn.execute(
+				"INSERT OR REPLACE INTO assets (url, sha256, path, etag, last_modified, checked_at, options)"
+				" VALUES (?, ?, ?, ?, ?, ?, ?)",
+				(url, sha256, path, etag, last_modified, now, options),
+			)
+			self._conn.commit()
+		return AssetRecord(url, sha256, path, etag, last_modified, now, options)
+
+	def touch(self, url: str) -> None:
+		"""条件请求返回 304 时刷新校验时间。"""
+		with self.lock:
+			self._conn.execute("UPDATE assets SET checked_at = ? WHERE url = ?", (time.time(), url))
+			self._conn.commit()
+
+	def __len__(self) -> int:
+		with self.lock:
+			return self._conn.execute("SELECT COUNT(*) FROM assets").fetchone()[0]
+
+
+_indexes: dict[Path, AssetIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def index_for_dir(save_dir: PathLike) -> AssetIndex:
+	"""返回保存目录对应的共享索引（目录下的 .assets.sqlite3），同一目录在进程内只打开一次。"""
+	db_path = (Path(save_dir) / ".assets.sqlite3").resolve()
+	with _indexes_lock:
+		index = _indexes.get(db_path)
+		if index is None:
+			index = _indexes[db_path] = AssetIndex(db_path)
+		return index
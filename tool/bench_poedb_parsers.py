@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+from typing import Optional
+
+from tool.poedb_parsers import DEFAULT_BACKEND, available_backends, extract_lines_and_image
+
+
+# 整页缓存目录：工作流的页面缓存（tmp/poedb_cache）开了 popup_only，里面只有弹窗片段，
+# 解析片段测不出整页解析的差别，基准测试用单独抓取的整页
+DEFAULT_PAGES_DIR = "tmp/poedb_pages"
+
+
+def _is_fragment(html: str) -> bool:
+	# popup_only 写入缓存的是 <div> 开头的小片段，整页一定有 <html>
+	return "<html" not in html[:4096].lower()
+
+
+def capture_pages(count: int, pages_dir: str = DEFAULT_PAGES_DIR) -> int:
+	"""抓取前 count 个可堆叠通货的整页 HTML（不开 popup_only）写入 pages_dir，返回成功页数。"""
+	from tool.fetch_poedb_item_popup import PoedbFetcher
+	from tool.poedb_cache import PoedbHtmlCache
+	from tool.poedb_index import load_index
+
+	urls = [f"https://poedb.tw/cn/{e['value']}" for e in load_index().query(desc="可堆叠通货", limit=count)]
+	with PoedbHtmlCache(pages_dir, ttl_s=None) as cache, PoedbFetcher(cache=cache, fast=True) as fetcher:
+		ok = 0
+		for r in fetcher.fetch_many(urls):
+			if r.error is None:
+				ok += 1
+			else:
+				print(f"  抓取失败: {r.url}: {r.error}")
+	return ok
+
+
+def _collect_pages(paths: list[str]) -> list[Path]:
+	pages: list[Path] = []
+	for p in map(Path, paths):
+		if p.is_dir():
+			pages.extend(sorted(p.rglob("*.html")))
+		elif p.exists():
+			pages.append(p)
+	return pages
+
+
+def _safe_extract(html: str, backend: str) -> object:
+	try:
+		return extract_lines_and_image(html, backend)
+	except ValueError as e:
+		# 找不到弹窗也算一种输出，各后端应当一致
+		return ("ValueError", str(e))
+
+
+def run_benchmark(pages: list[Path], backends: list[str], *, repeat: int = 3) -> int:
+	"""对每个后端计时，并逐页与 bs4 的输出对比；返回不一致的页数。"""
+	htmls = [p.read_text(encoding="utf-8") for p in pages]
+	fragments = sum(1 for h in htmls if _is_fragment(h))
+	if fragments:
+		print(f"注意: {fragments}/{len(htmls)} 个文件是 popup_only 弹窗片段，测到的不是整页解析（用 --capture 抓整页）")
+	expected = [_safe_extract(h, DEFAULT_BACKEND) for h in htmls]
+
+	mismatches = 0
+	baseline: Optional[float] = None
+	print(f"页面数: {len(htmls)}，每个后端重复 {repeat} 轮，取最快一轮")
+	print(f"{'backend':<12}{'total_ms':>12}{'per_page_ms':>14}{'speedup':>10}{'mismatch':>10}")
+	for backend in backends:
+		best = float("inf")
+		outputs: list[object] = []
+		for _ in range(max(1, repeat)):
+			started = time.perf_counter()
+			outputs = [_safe_extract(h, backend) for h in htmls]
+			best = min(best, time.perf_counter() - started)
+		bad = [pages[i] for i, out in enumerate(outputs) if out != expected[i]]
+		mismatches += len(bad)
+		if backend == DEFAULT_BACKEND:
+			baseline = best
+		speedup = f"{baseline / best:.1f}x" if baseline and best else "-"
+		per_page = best * 1000 / len(htmls) if htmls else 0.0
+		print(f"{backend:<12}{best * 1000:>12.1f}{per_page:>14.3f}{speedup:>10}{len(bad):>10}")
+		for p in bad[:5]:
+			print(f"  输出不一致: {p}")
+	return mismatches
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+	parser = argparse.ArgumentParser(description="对比 POEDB 弹窗解析后端的速度与输出一致性")
+	parser.add_argument(
+		"paths",
+		nargs="*",
+		default=[f"{DEFAULT_PAGES_DIR}/blobs"],
+		help=f"抓取下来的整页文件或目录（默认 {DEFAULT_PAGES_DIR}/blobs）",
+	)
+	parser.add_argument(
+		"--capture", type=int, default=0, metavar="N",
+		help=f"先抓取 N 个物品的整页写入 {DEFAULT_PAGES_DIR}（需要 playwright）",
+	)
+	parser.add_argument("--repeat", type=int, default=3, help="每个后端重复轮数")
+	parser.add_argument("--backend", action="append", dest="backends", help="只测指定后端，可重复传入")
+	args = parser.parse_args(argv)
+
+	if args.capture > 0:
+		print(f"抓取整页: {capture_pages(args.capture)}/{args.capture}")
+	pages = _collect_pages(args.paths)
+	if not pages:
+		print("没有找到可用的页面文件，先用 --capture N 抓取一批整页")
+		return 2
+
+	backends = args.backends or available_backends()
+	if DEFAULT_BACKEND not in backends:
+		# bs4 作为基准必须参与计时
+		backends.insert(0, DEFAULT_BACKEND)
+	if len(backends) < 2:
+		# 只有 bs4 时等于自己和自己比，测不出任何东西
+		print("只有 bs4 一个后端，没有可对比的（lxml/selectolax 未安装或未用 --backend 指定），先 pip install -r requirements.txt")
+		return 2
+	return 1 if run_benchmark(pages, backends, repeat=args.repeat) else 0
+
+
+if __name__ == "__main__":
+	sys.exit(main())
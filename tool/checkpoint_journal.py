@@ -0,0 +1,190 @@
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Optional, Union
+
+
+PathLike = Union[str, os.PathLike]
+
+STATUS_PENDING = "pending"
+STATUS_DONE = "done"
+STATUS_FAILED = "failed"
+
+
+class StageInterruptedError(RuntimeError):
+	"""非幂等阶段（如上传）上次执行到一半进程就退出了，无法确认服务端是否已创建。"""
+
+
+class CheckpointJournal:
+	"""按 (条目 key, 阶段名) 记录流水线进度的 SQLite 断点日志。
+
+	用法：
+		journal = CheckpointJournal("tmp/workflow_journal.sqlite3")
+		lines = journal.run(item["value"], "fetch", lambda: fetcher.fetch(url))
+
+	说明：
+	- 已完成的阶段直接返回上次保存的输出（输出需可 JSON 序列化），不再重复执行；
+	- 失败的阶段记录错误信息，下次运行会重试；
+	- idempotent=False 的阶段（创建模板/文章）执行前先写 pending，
+	  若进程在请求途中退出，下次运行会抛 StageInterruptedError 而不是盲目重发，
+	  人工核对后用 reset() 清掉该记录即可重试；
+	- 同理，非幂等阶段抛出的异常若被 ambiguous 判定为“请求可能已生效”（如读超时），
+	  记录保持 pending 而不是 failed，下次运行同样不会自动重发；
+	- 每次写入立即提交，可以在多个线程里共用同一个实例。
+	"""
+
+	def __init__(self, db_path: PathLike = "tmp/workflow_journal.sqlite3") -> None:
+		self.db_path = Path(db_path)
+		self.db_path.parent.mkdir(parents=True, exist_ok=True)
+		self._lock = threading.Lock()
+		self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+		self._conn.execute("PRAGMA journal_mode=WAL")
+		self._conn.execute(
+			"""
+			CREATE TABLE IF NOT EXISTS stage_log (
+				item_key   TEXT NOT NULL,
+				stage      TEXT NOT NULL,
+				status     TEXT NOT NULL,
+				output     TEXT,
+				error      TEXT,
+				attempts   INTEGER NOT NULL DEFAULT 0,
+				updated_at REAL NOT NULL,
+				PRIMARY KEY (item_key, stage)
+			)
+			"""
+		)
+		self._conn.commit()
+
+	def __enter__(self) -> "CheckpointJournal":
+		return self
+
+	def __exit__(self, *exc: object) -> None:
+		self.close()
+
+	def close(self) -> None:
+		with self._lock:
+			self._conn.close()
+
+	def _write(self, item_key: str, stage: str, status: str, output: Any = None, error: str = "") -> None:
+		payload = None if output is None else json.dumps(output, ensure_ascii=False)
+		with self._lock:
+			self._conn.execute(
+				"""
+				INSERT INTO stage_log (item_key, stage, status, output, error, attempts, updated_at)
+				VALUES (?, ?, ?, ?, ?, ?, ?)
+				ON CONFLICT (item_key, stage) DO UPDATE SET
+					status = excluded.status,
+					output = excluded.output,
+					error = excluded.error,
+					attempts = stage_log.attempts + excluded.attempts,
+					updated_at = excluded.updated_at
+				""",
+				(item_key, stage, status, payload, error, 0 if status == STATUS_PENDING else 1, time.time()),
+			)
+			self._conn.commit()
+
+	def status(self, item_key: str, stage: str) -> Optional[str]:
+		"""返回阶段状态：done / failed / pending；从未执行过返回 None。"""
+		with self._lock:
+			row = self._conn.execute(
+				"SELECT status FROM stage_log WHERE item_key = ? AND stage = ?", (item_key, stage)
+			).fetchone()
+		return row[0] if row else None
+
+	def is_done(self, item_key: str, stage: str) -> bool:
+		return self.status(item_key, stage) == STATUS_DONE
+
+	def output(self, item_key: str, stage: str) -> Any:
+		"""返回已完成阶段保存的输出；未完成时抛 KeyError。"""
+		with self._lock:
+			row = self._conn.execute(
+				"SELECT output FROM stage_log WHERE item_key = ? AND stage = ? AND status = ?",
+				(item_key, stage, STATUS_DONE),
+			).fetchone()
+		if row is None:
+			raise KeyError((item_key, stage))
+		return None if row[0] is None else json.loads(row[0])
+
+	def outputs(self, item_key: str) -> dict[str, Any]:
+		"""返回某个条目所有已完成阶段的输出：{阶段名: 输出}。"""
+		with self._lock:
+			rows = self._conn.execute(
+				"SELECT stage, output FROM stage_log WHERE item_key = ? AND status = ?",
+				(item_key, STATUS_DONE),
+			).fetchall()
+		return {stage: (None if out is None else json.loads(out)) for stage, out in rows}
+
+	def mark_done(self, item_key: str, stage: str, output: Any = None) -> None:
+		self._write(item_key, stage, STATUS_DONE, output=output)
+
+	def mark_failed(self, item_key: str, stage: str, error: BaseException | str) -> None:
+		self._write(item_key, stage, STATUS_FAILED, error=repr(error) if isinstance(error, BaseException) else error)
+
+	def reset(self, item_key: str, stage: Optional[str] = None) -> None:
+		"""删除某个条目（或其中一个阶段）的记录，下次运行会重新执行。"""
+		with self._lock:
+			if stage is None:
+				self._conn.execute("DELETE FROM stage_log WHERE item_key = ?", (item_key,))
+			else:
+				self._conn.execute("DELETE FROM stage_log WHERE item_key = ? AND stage = ?", (item_key, stage))
+			self._conn.commit()
+
+	def pending(self) -> list[tuple[str, str, str]]:
+		"""列出所有停在 pending 的阶段：[(条目 key, 阶段名, 最近一次错误)]，需人工核对后 reset()。"""
+		with self._lock:
+			rows = self._conn.execute(
+				"SELECT item_key, stage, COALESCE(error, '') FROM stage_log WHERE status = ? ORDER BY updated_at",
+				(STATUS_PENDING,),
+			).fetchall()
+		return [tuple(r) for r in rows]
+
+	def run(
+		self,
+		item_key: str,
+		stage: str,
+		func: Callable[[], Any],
+		*,
+		idempotent: bool = True,
+		ambiguous: Optional[Callable[[BaseException], bool]] = None,
+	) -> Any:
+		"""执行一个阶段并记录结果；已完成则直接返回保存的输出。
+
+		ambiguous 只对非幂等阶段生效：返回 True 的异常（请求可能已被服务端处理）不记为 failed，
+		保持 pending，下次运行抛 StageInterruptedError，避免重复提交。
+		"""
+		status = self.status(item_key, stage)
+		if status == STATUS_DONE:
+			return self.output(item_key, stage)
+		if status == STATUS_PENDING and not idempotent:
+			raise StageInterruptedError(
+				f"{item_key} 的 {stage} 阶段上次执行中断或结果未知，无法确认是否已提交；"
+				f"核对后调用 reset({item_key!r}, {stage!r}) 再重试"
+			)
+		if not idempotent:
+			self._write(item_key, stage, STATUS_PENDING)
+		try:
+			result = func()
+		except Exception as e:
+			if not idempotent and ambiguous is not None and ambiguous(e):
+				self._write(item_key, stage, STATUS_PENDING, error=repr(e))
+			else:
+				self.mark_failed(item_key, stage, e)
+			raise
+		self.mark_done(item_key, stage, result)
+		return result
+
+	def summary(self) -> dict[str, dict[str, int]]:
+		"""按阶段统计各状态数量：{阶段名: {状态: 数量}}。"""
+		with self._lock:
+			rows = self._conn.execute(
+				"SELECT stage, status, COUNT(*) FROM stage_log GROUP BY stage, status"
+			).fetchall()
+		out: dict[str, dict[str, int]] = {}
+		for stage, status, count in rows:
+			out.setdefault(stage, {})[status] = count
+		return out
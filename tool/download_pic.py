@@ -1,11 +1,25 @@
 from __future__ import annotations
 
+import hashlib
 import os
 import re
+import shutil
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from pathlib import Path
+from typing import Callable, Iterable
 from urllib.parse import urlparse
 
 import requests
+from requests.adapters import HTTPAdapter
+
+from tool.asset_index import AssetIndex, AssetRecord, index_for_dir, sha256_file
+from tool.webp_to_png import PngOptions, convert_webp_bytes_to_png
+
+
+DEFAULT_USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0 Safari/537.36"
 
 
 def _safe_filename(name: str, *, fallback: str = "image") -> str:
@@ -36,6 +50,65 @@ def _dedupe_path(path: Path) -> Path:
 
 
 
+def _filename_from_response(r: requests.Response) -> str:
+	# 文件名优先取 Content-Disposition，其次取 URL 的 path
+	cd = r.headers.get("Content-Disposition", "")
+	m = re.search(r"filename\*=UTF-8''([^;]+)", cd)
+	if m:
+		return _safe_filename(requests.utils.unquote(m.group(1)))
+	m2 = re.search(r'filename="?([^";]+)"?', cd)
+	if m2:
+		return _safe_filename(m2.group(1))
+	ext = _infer_ext_from_url(r.url)
+	stem = _safe_filename(Path(urlparse(r.url).path).stem, fallback="image")
+	return stem + ext
+
+
+def _store_download(tmp: Path, digest: str, save_root: Path, filename: str, index: AssetIndex) -> Path:
+	"""把下载到临时文件的内容按文件名落盘（同名不同内容才加后缀）。
+
+	相同内容已被别的 URL 保存过时，本 URL 仍得到自己的文件（硬链接到已有文件，不行再复制），
+	后续按 URL 文件名转换/引用的步骤（convert_many、convert_poedb_img）都能找到它。
+	"""
+	with index.lock:
+		dst = save_root / filename
+		if dst.exists() and sha256_file(dst) == digest:
+			# 之前就下载过的同名同内容文件
+			tmp.unlink()
+			return dst
+		dst = _dedupe_path(dst)
+		existing = index.blob_path(digest)
+		if existing is not None:
+			tmp.unlink()
+			_link_or_copy(Path(existing), dst)
+		else:
+			os.replace(tmp, dst)
+		return dst
+
+
+def _usable_record(index: AssetIndex, url: str, *, force: bool, options: str = "") -> AssetRecord | None:
+	"""索引里该 URL 的记录；force、本地文件已丢失或转换参数（options）不同时返回 None。"""
+	record = None if force else index.lookup(url)
+	if record is not None and (not record.exists() or record.options != options):
+		return None
+	return record
+
+
+def _request_headers(url: str, user_agent: str, record: AssetRecord | None) -> dict[str, str]:
+	headers = {
+		"User-Agent": user_agent,
+		"Accept": "image/avif,image/webp,image/apng,image/*,*/*;q=0.8",
+		"Referer": url,
+	}
+	# 有本地副本时发条件请求，内容没变服务端返回 304，不再传输图片
+	if record is not None:
+		if record.etag:
+			headers["If-None-Match"] = record.etag
+		if record.last_modified:
+			headers["If-Modified-Since"] = record.last_modified
+	return headers
+
+
 def download_image(
 	url: str,
 	save_dir: str | os.PathLike[str],
@@ -43,9 +116,13 @@ def download_image(
 	timeout_s: float = 30.0,
 	retries: int = 3,
 	chunk_size: int = 256 * 1024,
-	user_agent: str = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0 Safari/537.36",
+	user_agent: str = DEFAULT_USER_AGENT,
+	index: AssetIndex | None = None,
+	max_age_s: float = 24 * 3600,
+	force: bool = False,
+	session: requests.Session | None = None,
 ) -> str:
-	"""最简单的直接下载图片。
+	"""下载图片，已下载过的不重复下载、相同内容不重复保存。
 
 	参数:
 		url: 图片地址（直链）
@@ -55,57 +132,96 @@ def download_image(
 		timeout_s: 超时秒数
 		retries: 失败重试次数
 		chunk_size: 流式写入的块大小
+		index: 资源索引，默认使用 save_dir/.assets.sqlite3
+		max_age_s: 距上次校验不超过这个时间直接返回本地文件，不发请求；
+			超过后带 If-None-Match/If-Modified-Since 发条件请求，304 时仍用本地文件
+		force: 忽略索引，无条件重新下载（内容不变时仍复用原文件）
+		session: 复用的 requests.Session，不传则每次新建
 
 	返回:
 		保存后的本地文件绝对路径（str）
 	"""
+	return _download_image(
+		url,
+		save_dir,
+		timeout_s=timeout_s,
+		retries=retries,
+		chunk_size=chunk_size,
+		user_agent=user_agent,
+		index=index,
+		max_age_s=max_age_s,
+		force=force,
+		session=session,
+	)[0]
+
+
+def _download_image(
+	url: str,
+	save_dir: str | os.PathLike[str],
+	*,
+	timeout_s: float = 30.0,
+	retries: int = 3,
+	chunk_size: int = 256 * 1024,
+	user_agent: str = DEFAULT_USER_AGENT,
+	index: AssetIndex | None = None,
+	max_age_s: float = 24 * 3600,
+	force: bool = False,
+	session: requests.Session | None = None,
+) -> tuple[str, int]:
+	"""download_image 的实现，另外返回本次实际收到的字节数（索引命中/304 为 0）。"""
 	save_root = Path(save_dir)
 	save_root.mkdir(parents=True, exist_ok=True)
+	if index is None:
+		index = index_for_dir(save_root)
 
-	headers = {
-		"User-Agent": user_agent,
-		"Accept": "image/avif,image/webp,image/apng,image/*,*/*;q=0.8",
-		"Referer": url,
-	}
+	record = _usable_record(index, url, force=force)
+	if record is not None and record.age_s <= max_age_s:
+		return record.path, 0
+	headers = _request_headers(url, user_agent, record)
 
-	session = requests.Session()
+	if session is None:
+		session = requests.Session()
 	last_exc: Exception | None = None
 
 	for attempt in range(1, max(1, retries) + 1):
+		tmp: Path | None = None
 		try:
 			with session.get(url, headers=headers, stream=True, timeout=timeout_s, allow_redirects=True) as r:
+				if r.status_code == 304 and record is not None:
+					index.touch(url)
+					return record.path, 0
 				r.raise_for_status()
 
-				# 文件名优先取 Content-Disposition，其次取 URL 的 path
-				filename = ""
-				cd = r.headers.get("Content-Disposition", "")
-				m = re.search(r"filename\*=UTF-8''([^;]+)", cd)
-				if m:
-					filename = requests.utils.unquote(m.group(1))
-				else:
-					m2 = re.search(r'filename="?([^";]+)"?', cd)
-					if m2:
-						filename = m2.group(1)
-
-				if filename:
-					filename = _safe_filename(filename)
-				else:
-					ext = _infer_ext_from_url(r.url)
-					stem = _safe_filename(Path(urlparse(r.url).path).stem, fallback="image")
-					filename = stem + ext
-
-				dst = _dedupe_path(save_root / filename)
-
-				with open(dst, "wb") as f:
+				filename = _filename_from_response(r)
+				fd, tmp_name = tempfile.mkstemp(dir=save_root, prefix=".download-", suffix=".part")
+				tmp = Path(tmp_name)
+				h = hashlib.sha256()
+				received = 0
+				with os.fdopen(fd, "wb") as f:
 					for chunk in r.iter_content(chunk_size=chunk_size):
 						if chunk:
+							h.update(chunk)
 							f.write(chunk)
+							received += len(chunk)
 
-				return str(dst.resolve())
+				digest = h.hexdigest()
+				dst = _store_download(tmp, digest, save_root, filename, index)
+				tmp = None
+				rec = index.record(
+					url,
+					sha256=digest,
+					path=dst,
+					etag=r.headers.get("ETag", ""),
+					last_modified=r.headers.get("Last-Modified", ""),
+				)
+				return rec.path, received
 		except Exception as e:
 			last_exc = e
 			if attempt >= max(1, retries):
 				raise
+		finally:
+			if tmp is not None and tmp.exists():
+				tmp.unlink()
 
 	# 理论上不会走到这里
 	if last_exc is not None:
@@ -113,6 +229,218 @@ def download_image(
 	raise RuntimeError("download_image: 未知错误")
 
 
+def download_image_as_png(
+	url: str,
+	png_dir: str | os.PathLike[str],
+	*,
+	keep_webp_dir: str | os.PathLike[str] | None = None,
+	png_options: PngOptions | None = None,
+	timeout_s: float = 30.0,
+	retries: int = 3,
+	user_agent: str = DEFAULT_USER_AGENT,
+	index: AssetIndex | None = None,
+	max_age_s: float = 24 * 3600,
+	force: bool = False,
+	session: requests.Session | None = None,
+) -> str:
+	"""下载图片并在内存里直接转成 PNG，只写最终的 PNG 文件。
+
+	与 download_image 共用索引逻辑（默认 png_dir/.assets.sqlite3，URL → PNG 路径，
+	按原始字节 + png_options 去重）：新鲜的记录直接返回，过期的发条件请求。
+	PNG 总是保存为 png_dir/<文件名>.png；内容相同的图标只转换一次，其余 URL 硬链接（或复制）到自己的文件名。
+	keep_webp_dir 不为空时，同时把原始字节保存一份到该目录；png_options 控制压缩/量化。
+
+	返回:
+		PNG 文件绝对路径（str）
+	"""
+	return _download_image_as_png(
+		url,
+		png_dir,
+		keep_webp_dir=keep_webp_dir,
+		png_options=png_options,
+		timeout_s=timeout_s,
+		retries=retries,
+		user_agent=user_agent,
+		index=index,
+		max_age_s=max_age_s,
+		force=force,
+		session=session,
+	)[0]
+
+
+def _download_image_as_png(
+	url: str,
+	png_dir: str | os.PathLike[str],
+	*,
+	keep_webp_dir: str | os.PathLike[str] | None = None,
+	png_options: PngOptions | None = None,
+	timeout_s: float = 30.0,
+	retries: int = 3,
+	user_agent: str = DEFAULT_USER_AGENT,
+	index: AssetIndex | None = None,
+	max_age_s: float = 24 * 3600,
+	force: bool = False,
+	session: requests.Session | None = None,
+) -> tuple[str, int]:
+	"""download_image_as_png 的实现，另外返回本次实际收到的字节数（索引命中/304 为 0）。"""
+	png_root = Path(png_dir)
+	png_root.mkdir(parents=True, exist_ok=True)
+	if index is None:
+		index = index_for_dir(png_root)
+
+	options_key = _png_options_key(png_options)
+	record = _usable_record(index, url, force=force, options=options_key)
+	if record is not None and record.age_s <= max_age_s:
+		return record.path, 0
+	headers = _request_headers(url, user_agent, record)
+
+	if session is None:
+		session = requests.Session()
+
+	for attempt in range(1, max(1, retries) + 1):
+		try:
+			r = session.get(url, headers=headers, timeout=timeout_s, allow_redirects=True)
+			if r.status_code == 304 and record is not None:
+				index.touch(url)
+				return record.path, 0
+			r.raise_for_status()
+			data = r.content
+			break
+		except Exception:
+			if attempt >= max(1, retries):
+				raise
+
+	filename = _filename_from_response(r)
+	if keep_webp_dir is not None:
+		webp_root = Path(keep_webp_dir)
+		webp_root.mkdir(parents=True, exist_ok=True)
+		webp_path = webp_root / filename
+		if not webp_path.exists() or webp_path.stat().st_size != len(data):
+			webp_path.write_bytes(data)
+
+	png_path = png_root / f"{Path(filename).stem}.png"
+	key = _png_blob_key(data, png_options)
+	with index.lock:
+		existing = index.blob_path(key)
+	# 解码/编码比较耗时，放在锁外做，多个下载线程可以同时转换；锁只保护查重与登记
+	if existing is None:
+		# 同名 PNG 直接覆盖：同一 URL 的图标更新后，PNG 也随之更新
+		_replace_with(png_path, lambda tmp: convert_webp_bytes_to_png(data, tmp, options=png_options))
+	elif Path(existing) != png_path.resolve():
+		# 内容相同的图标已转换过：在本 URL 对应的文件名下放一份（优先硬链接），模板里的地址按它拼接
+		_replace_with(png_path, lambda tmp: _link_or_copy(Path(existing), tmp))
+	with index.lock:
+		rec = index.record(
+			url,
+			sha256=key,
+			path=png_path,
+			etag=r.headers.get("ETag", ""),
+			last_modified=r.headers.get("Last-Modified", ""),
+			options=options_key,
+		)
+	return rec.path, len(data)
+
+
+def _png_options_key(options: PngOptions | None) -> str:
+	"""转换参数的字符串形式，记入索引；参数变了之前的记录（即使还新鲜）都按未命中处理。"""
+	return repr(options or PngOptions())
+
+
+def _png_blob_key(data: bytes, options: PngOptions | None) -> str:
+	"""PNG 的去重键：原始字节 + 转换参数，参数变了不会复用按旧参数生成的 PNG。"""
+	h = hashlib.sha256(data)
+	h.update(b"\0" + _png_options_key(options).encode("utf-8"))
+	return h.hexdigest()
+
+
+def _replace_with(dst: Path, write: Callable[[Path], object]) -> None:
+	"""先写到同目录的临时文件再整体替换 dst：并发写同一文件不会交错，也不会改到与 dst 硬链接的其他文件。"""
+	fd, tmp_name = tempfile.mkstemp(dir=dst.parent, prefix=".png-", suffix=".part")
+	os.close(fd)
+	tmp = Path(tmp_name)
+	try:
+		tmp.unlink()
+		write(tmp)
+		os.replace(tmp, dst)
+	finally:
+		if tmp.exists():
+			tmp.unlink()
+
+
+def _link_or_copy(src: Path, dst: Path) -> None:
+	try:
+		os.link(src, dst)
+	except OSError:
+		shutil.copyfile(src, dst)
+
+
+def make_session(pool_maxsize: int = 16) -> requests.Session:
+	"""下载用的共享 Session：连接池大小与并发线程数一致，多线程复用 keep-alive 连接。"""
+	session = requests.Session()
+	adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_maxsize)
+	session.mount("https://", adapter)
+	session.mount("http://", adapter)
+	return session
+
+
+@dataclass
+class DownloadResult:
+	"""单个 URL 的批量下载结果；失败时 path 为空、error 为异常。
+
+	bytes 为本次实际从网络收到的字节数（下载的原始图片），索引命中或 304 时为 0。
+	"""
+
+	url: str
+	path: str = ""
+	error: Exception | None = None
+	bytes: int = 0
+	elapsed_s: float = 0.0
+
+	@property
+	def ok(self) -> bool:
+		return self.error is None
+
+
+def download_images(
+	urls: Iterable[str],
+	save_dir: str | os.PathLike[str],
+	*,
+	max_workers: int = 16,
+	session: requests.Session | None = None,
+	to_png: bool = False,
+	**kwargs,
+) -> list[DownloadResult]:
+	"""并发下载一批图片，按输入顺序返回每个 URL 的结果（单个失败不影响其他）。
+
+	所有线程共用一个带连接池的 Session；其余关键字参数原样传给 download_image
+	（index/max_age_s/force/timeout_s/retries 等），索引命中的 URL 不会发请求。
+	to_png=True 时改用 download_image_as_png，save_dir 即 PNG 目录（可传 keep_webp_dir）。
+	"""
+	fetch = _download_image_as_png if to_png else _download_image
+	urls = list(urls)
+	own_session = session is None
+	if session is None:
+		session = make_session(max_workers)
+	index = kwargs.pop("index", None) or index_for_dir(save_dir)
+
+	def one(url: str) -> DownloadResult:
+		started = time.perf_counter()
+		result = DownloadResult(url=url)
+		try:
+			result.path, result.bytes = fetch(url, save_dir, session=session, index=index, **kwargs)
+		except Exception as e:
+			result.error = e
+		result.elapsed_s = time.perf_counter() - started
+		return result
+
+	try:
+		with ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="download") as pool:
+			return list(pool.map(one, urls))
+	finally:
+		if own_session:
+			session.close()
+
+
 if __name__ == "__main__":
 	# 例子：可以替换为任意图片直链或需要浏览器才能拿到的地址
 	out = download_image(
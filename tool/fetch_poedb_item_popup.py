@@ -1,127 +1,528 @@
-from playwright.sync_api import sync_playwright
+from playwright.async_api import async_playwright
 from playwright.sync_api import TimeoutError as PlaywrightTimeoutError
+import asyncio
+import html as html_lib
 import re
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
 from pathlib import Path
 from datetime import datetime
+from urllib.parse import urlparse
+from typing import Any, Coroutine, Iterable, Iterator, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from tool.poedb_cache import PoedbHtmlCache
+from tool.item_store import ItemPopup
+from tool.poedb_parsers import DEFAULT_BACKEND, extract_lines_and_image, extract_popup_parts, lines_from_parts
 
 
 URL = "https://poedb.tw/cn/Blacksmiths_Whetstone"
 
+# 快速模式下直接拦截的资源类型，以及允许放行的站点（其余第三方域名一律拦截）
+_BLOCKED_RESOURCE_TYPES = frozenset({"image", "media", "font"})
+_FIRST_PARTY_HOST = "poedb.tw"
+
+# 直连 HTTP 时使用的请求头（与浏览器保持一致，避免被当成爬虫拦截）
+_HTTP_HEADERS = {
+	"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0 Safari/537.36",
+	"Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+	"Accept-Language": "zh-CN,zh;q=0.9,en;q=0.5",
+}
+
+# 弹窗节点已挂载且有文本内容才算渲染完成
+_POPUP_READY_JS = """() => {
+	const popup = document.querySelector("div.newItemPopup");
+	return !!popup && popup.textContent.trim().length > 0;
+}"""
+
+# 在页面里直接取弹窗 outerHTML 与图片 src（查找顺序与 _extract_lines_and_image 一致），
+# 避免把整页 DOM 序列化后传回 Python
+_POPUP_EXTRACT_JS = """() => {
+	const popup = document.querySelector("div.newItemPopup.currencyPopup")
+		|| document.querySelector("div.newItemPopup");
+	if (!popup) return null;
+	let image = "";
+	let container = popup;
+	for (let i = 0; i < 6 && container; i++) {
+		const img = container.querySelector("div.itemboximage img");
+		const src = img && img.getAttribute("src");
+		if (src) { image = src; break; }
+		container = container.parentElement;
+	}
+	return {popup: popup.outerHTML, image: image};
+}"""
+
+
+def _extract_lines_and_image(html: str, parser: str = DEFAULT_BACKEND) -> tuple[list[str], str]:
+	"""抽取弹窗文本行与图片链接；parser 选择解析后端（bs4 / lxml / selectolax），结果一致。"""
+	return extract_lines_and_image(html, backend=parser)
+
+
+def _value_from_url(url: str) -> str:
+	"""poedb 物品页 URL 的最后一段即数据文件里的 value，如 .../cn/Chaos_Orb -> Chaos_Orb。"""
+	return urlparse(url).path.rstrip("/").rsplit("/", 1)[-1]
+
+
+def _parse_html(html: str, url: str, parser: str = DEFAULT_BACKEND) -> tuple[list[str], ItemPopup]:
+	"""解析 HTML，返回 (内容文本 list（最后一项为图片链接，如果能找到）, 结构化记录)。"""
+	parts = extract_popup_parts(html, parser)
+	lines = lines_from_parts(parts)
+	if parts.image_src:
+		lines.append(parts.image_src)
+	return lines, ItemPopup.from_parts(_value_from_url(url), parts)
+
+
+@dataclass
+class _Fetched:
+	"""抓取协程的返回值；item 为 None 表示还没解析（交给调用方线程解析）。"""
+
+	html: str
+	timings: dict[str, float]
+	source: str
+	lines: Optional[list[str]] = None
+	item: Optional[ItemPopup] = None
+
+
+def _compact_popup_html(popup_html: str, image_src: str) -> str:
+	"""把弹窗 outerHTML 和图片 src 拼成一个最小片段。
+
+	图片放在弹窗前面的 div.itemboximage 里，解析时沿祖先查找会先找到它，
+	因此片段与整页的解析结果相同，也可以直接写入页面缓存。
+	"""
+	if not image_src:
+		return f"<div>{popup_html}</div>"
+	src = html_lib.escape(image_src, quote=True)
+	return f'<div><div class="itemboximage"><img src="{src}"></div>{popup_html}</div>'
 
-def _extract_lines_and_image(html: str) -> tuple[list[str], str]:
+
+def _is_first_party(url: str) -> bool:
+	host = (urlparse(url).hostname or "").lower()
+	return host == _FIRST_PARTY_HOST or host.endswith("." + _FIRST_PARTY_HOST)
+
+
+async def _block_heavy_resources(route: Any) -> None:
+	"""快速模式的路由过滤：图片/媒体/字体以及第三方域名（广告、统计）直接中止。"""
+	request = route.request
+	if request.resource_type in _BLOCKED_RESOURCE_TYPES or not _is_first_party(request.url):
+		await route.abort()
+	else:
+		await route.continue_()
+
+
+async def _save_timeout_snapshot(page: Any, url: str) -> tuple[str, str]:
+	"""等待超时时把页面截图/HTML 落地到 tmp/，便于排查；返回两个文件名。"""
+	tmp_dir = Path(__file__).resolve().parents[1] / "tmp"
+	tmp_dir.mkdir(parents=True, exist_ok=True)
+	tag = datetime.now().strftime("%Y%m%d_%H%M%S")
+	safe_name = re.sub(r"[^a-zA-Z0-9_-]+", "_", url)[:80]
+	screenshot_path = tmp_dir / f"poedb_timeout_{tag}_{safe_name}.png"
+	html_path = tmp_dir / f"poedb_timeout_{tag}_{safe_name}.html"
 	try:
-		from bs4 import BeautifulSoup  # type: ignore[import-not-found]
-	except ImportError as e:
-		raise ImportError("缺少依赖 beautifulsoup4，请先安装 requirements.txt") from e
-
-	soup = BeautifulSoup(html, "html.parser")
-
-	popup = soup.select_one("div.newItemPopup.currencyPopup") or soup.select_one("div.newItemPopup")
-	if popup is None:
-		raise ValueError("未找到 .newItemPopup，可能页面结构变更或尚未渲染完成")
-
-	# 同组图片一般位于 popup 的祖先容器中
-	image_src = ""
-	container = popup
-	for _ in range(6):
-		img = container.select_one("div.itemboximage img")
-		if img and img.get("src"):
-			image_src = str(img.get("src"))
-			break
-		if container.parent is None:
-			break
-		container = container.parent
-
-	# 逐行抽取：按页面展示顺序把关键块的文本拆成行
-	lines: list[str] = []
-
-	name = popup.select_one(".itemName .lc")
-	if name:
-		lines.append(name.get_text(strip=True))
-
-	for prop in popup.select(".Stats .property"):
-		text = prop.get_text(" ", strip=True)
-		if not text:
-			continue
-		# 货币类弹窗里偶尔会出现“限制: 1”等属性，这会导致返回列表下标整体后移。
-		# 下游逻辑按固定位置取值，因此这里过滤掉该行。
-		# 过滤不稳定/不需要的属性行：例如“限制: 1”（不同物品可能是其他数字）
-		if re.match(r"^限制\s*:?\s*\d+\s*$", text):
-			continue
-		# 例：堆叠数量: 1/40（或 1 / 40） -> 拆成两项：
-		# - 堆叠数量
-		# - 1/40
-		m = re.match(r"^(堆叠数量)\s*:?\s*(\d+)\s*/\s*(\d+)$", text)
-		if m:
-			lines.append(m.group(1))
-			lines.append(f"{m.group(2)}/{m.group(3)}")
-			continue
-		lines.append(text)
-
-	for mod in popup.select(".Stats .explicitMod"):
-		text = mod.get_text(" ", strip=True)
-		if text:
-			lines.append(text)
-
-	default_desc = popup.select_one(".default")
-	if default_desc:
-		# 保留换行（你示例里需要把 Shift 那行保留下来）
-		text = default_desc.get_text("\n", strip=True)
-		if text:
-			lines.append(text)
-
-	# 英文名（示例中在 content 下的最后一个 div）
-	content = popup.select_one(".content")
-	if content:
-		divs = content.find_all("div", recursive=False)
-		if divs:
-			text = divs[-1].get_text(" ", strip=True)
-			if text:
-				lines.append(text)
-
-	return lines, image_src
-
-
-def fetch_poedb_item_lines(url: str, *, timeout_ms: int = 60000, headless: bool = True) -> list[str]:
-	"""抓取 POEDB 页面，返回内容文本 list（最后一项为图片链接，如果能找到）。"""
-	with sync_playwright() as p:
-		browser = p.chromium.launch(headless=headless)
-		page = browser.new_page(locale="zh-CN")
-		page.goto(url, wait_until="domcontentloaded", timeout=timeout_ms)
-		# POEDB 的弹窗内容通常依赖 JS/资源加载，domcontentloaded 后未必已经渲染完成。
-		page.wait_for_load_state("networkidle", timeout=timeout_ms)
-		try:
-			page.wait_for_selector("div.newItemPopup", timeout=timeout_ms, state="attached")
-		except PlaywrightTimeoutError as e:
-			# 便于排查：把当时页面快照落地到 tmp/
-			tmp_dir = Path(__file__).resolve().parents[1] / "tmp"
-			tmp_dir.mkdir(parents=True, exist_ok=True)
-			tag = datetime.now().strftime("%Y%m%d_%H%M%S")
-			safe_name = re.sub(r"[^a-zA-Z0-9_-]+", "_", url)[:80]
-			screenshot_path = tmp_dir / f"poedb_timeout_{tag}_{safe_name}.png"
-			html_path = tmp_dir / f"poedb_timeout_{tag}_{safe_name}.html"
-			try:
-				page.screenshot(path=str(screenshot_path), full_page=True)
-			except Exception:
-				pass
+		await page.screenshot(path=str(screenshot_path), full_page=True)
+	except Exception:
+		pass
+	try:
+		html_path.write_text(await page.content(), encoding="utf-8")
+	except Exception:
+		pass
+	return screenshot_path.name, html_path.name
+
+
+@dataclass
+class FetchResult:
+	"""批量抓取中单个 URL 的结果。
+
+	- lines: 与 fetch_poedb_item_lines 的返回值相同；失败时为空列表
+	- error: 失败时的异常（成功为 None）
+	- elapsed_s: 从提交到解析完成的耗时（秒，包含排队等待并发名额的时间）
+	- source: 内容来源，"cache" / "http"（直连 HTTP）/ "browser"
+	- timings: 各步骤耗时（秒）：http（直连尝试）/queue（等待页面名额）/goto/wait/content/parse，
+	  用于对比不同模式；缓存命中只有 parse
+	- html_bytes: 交给解析器的 HTML 大小（popup_only 模式下只有弹窗片段）
+	- item: 结构化记录 ItemPopup（推荐使用，不依赖 lines 的下标）；失败时为 None
+	"""
+
+	url: str
+	lines: list[str] = field(default_factory=list)
+	error: Optional[BaseException] = None
+	elapsed_s: float = 0.0
+	source: str = "browser"
+	timings: dict[str, float] = field(default_factory=dict)
+	html_bytes: int = 0
+	item: Optional[ItemPopup] = None
+
+	@property
+	def ok(self) -> bool:
+		return self.error is None
+
+
+class PoedbFetcher:
+	"""长生命周期的 POEDB 抓取器：整个批次只启动一个 Chromium，同时开多个页面。
+
+	用法：
+		with PoedbFetcher(concurrency=4) as fetcher:
+			lines = fetcher.fetch(url)
+			for r in fetcher.fetch_many(urls):
+				print(r.url, r.lines)
+
+	说明：
+	- 内部在独立线程里跑 asyncio 事件循环 + async Playwright，对外只暴露同步接口，
+	  所以普通脚本和线程池里都可以直接调用（fetch 是线程安全的）；
+	- 浏览器在第一次抓取时才启动，close() 时统一关闭；
+	- concurrency 限制的是同时打开的页面数，HTML 解析在调用方线程完成，不阻塞事件循环；
+	- 传入 cache 时先查本地 HTML 缓存，命中且未过期就不打开页面；全部命中时浏览器不会启动。
+	  force_refresh=True 忽略缓存强制重新抓取（抓到的内容仍会写回缓存）；
+	- fast=True 为快速模式：拦截图片/媒体/字体和第三方域名请求，不等 networkidle，
+	  弹窗节点挂载且有内容就立即取 HTML。各步骤耗时见 FetchResult.timings；
+	- http_first=True 时先用连接池里的 requests 直接 GET 页面，服务端返回的 HTML 里
+	  已有完整弹窗（有名称且找到图片）就直接用，否则再回退到浏览器；
+	  实际走的路径记录在 FetchResult.source；
+	- parser 选择 HTML 解析后端（见 tool/poedb_parsers.py），各后端输出一致，lxml/selectolax 更快；
+	- popup_only=True 时在页面里只取弹窗 outerHTML 和图片 src，拼成小片段再解析，
+	  不再用 page.content() 序列化整页；写入缓存的也是这个片段。
+	"""
+
+	def __init__(
+		self,
+		*,
+		concurrency: int = 4,
+		timeout_ms: int = 60000,
+		headless: bool = True,
+		cache: Optional[PoedbHtmlCache] = None,
+		force_refresh: bool = False,
+		fast: bool = False,
+		http_first: bool = False,
+		http_timeout_s: float = 10.0,
+		parser: str = DEFAULT_BACKEND,
+		popup_only: bool = False,
+	) -> None:
+		if concurrency < 1:
+			raise ValueError(f"concurrency 必须 >= 1，当前为 {concurrency}")
+		self.concurrency = concurrency
+		self.timeout_ms = timeout_ms
+		self.headless = headless
+		self.cache = cache
+		self.force_refresh = force_refresh
+		self.fast = fast
+		self.http_first = http_first
+		self.http_timeout_s = http_timeout_s
+		self.parser = parser
+		self.popup_only = popup_only
+		# 统计浏览器实际启动次数，方便确认没有重复启动
+		self.browser_launches = 0
+
+		self._lock = threading.Lock()
+		self._closed = False
+		self._loop: Optional[asyncio.AbstractEventLoop] = None
+		self._thread: Optional[threading.Thread] = None
+		self._playwright: Any = None
+		self._browser: Any = None
+		self._launch_lock: Optional[asyncio.Lock] = None
+		self._page_slots: Optional[asyncio.Semaphore] = None
+		self._http_pool: Optional[ThreadPoolExecutor] = None
+		self._session: Optional[requests.Session] = None
+
+	def __enter__(self) -> "PoedbFetcher":
+		return self
+
+	def __exit__(self, *exc: object) -> None:
+		self.close()
+
+	def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+		with self._lock:
+			if self._closed:
+				raise RuntimeError("PoedbFetcher 已关闭")
+			if self._loop is None:
+				loop = asyncio.new_event_loop()
+				thread = threading.Thread(target=loop.run_forever, name="poedb-fetcher", daemon=True)
+				thread.start()
+				self._loop, self._thread = loop, thread
+			if self.http_first and self._session is None:
+				# 直连请求在独立线程池里跑，连接池大小与线程数一致
+				workers = self.concurrency * 2
+				session = requests.Session()
+				adapter = HTTPAdapter(pool_connections=1, pool_maxsize=workers)
+				session.mount("https://", adapter)
+				session.mount("http://", adapter)
+				session.headers.update(_HTTP_HEADERS)
+				self._session = session
+				self._http_pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="poedb-http")
+			return self._loop
+
+	def _submit(self, coro: Coroutine[Any, Any, Any]) -> Future:
+		return asyncio.run_coroutine_threadsafe(coro, self._ensure_loop())
+
+	async def _get_browser(self) -> Any:
+		# 锁/信号量在事件循环线程里创建，避免绑定到错误的 loop
+		if self._launch_lock is None:
+			self._launch_lock = asyncio.Lock()
+			self._page_slots = asyncio.Semaphore(self.concurrency)
+		async with self._launch_lock:
+			if self._browser is None:
+				self._playwright = await async_playwright().start()
+				self._browser = await self._playwright.chromium.launch(headless=self.headless)
+				self.browser_launches += 1
+		return self._browser
+
+	async def _fetch_html(self, url: str) -> tuple[str, dict[str, float]]:
+		timings: dict[str, float] = {}
+		mark = time.perf_counter()
+		browser = await self._get_browser()
+		assert self._page_slots is not None
+		async with self._page_slots:
+			page = await browser.new_page(locale="zh-CN")
 			try:
-				html_path.write_text(page.content(), encoding="utf-8")
-			except Exception:
-				pass
-			browser.close()
-			raise PlaywrightTimeoutError(
-				f"等待 div.newItemPopup 超时（{timeout_ms}ms）。已保存截图/HTML 到 tmp/："
-				f"{screenshot_path.name} / {html_path.name}"
-			) from e
-		html = page.content()
-		browser.close()
-
-	lines, image_src = _extract_lines_and_image(html)
-	if image_src:
-		lines.append(image_src)
-	return lines
+				if self.fast:
+					await page.route("**/*", _block_heavy_resources)
+				now = time.perf_counter()
+				timings["queue"], mark = now - mark, now
+
+				await page.goto(url, wait_until="domcontentloaded", timeout=self.timeout_ms)
+				now = time.perf_counter()
+				timings["goto"], mark = now - mark, now
+
+				try:
+					if self.fast:
+						await page.wait_for_function(_POPUP_READY_JS, timeout=self.timeout_ms)
+					else:
+						# POEDB 的弹窗内容通常依赖 JS/资源加载，domcontentloaded 后未必已经渲染完成。
+						await page.wait_for_load_state("networkidle", timeout=self.timeout_ms)
+						await page.wait_for_selector("div.newItemPopup", timeout=self.timeout_ms, state="attached")
+				except PlaywrightTimeoutError as e:
+					screenshot_name, html_name = await _save_timeout_snapshot(page, url)
+					raise PlaywrightTimeoutError(
+						f"等待 div.newItemPopup 超时（{self.timeout_ms}ms）。已保存截图/HTML 到 tmp/："
+						f"{screenshot_name} / {html_name}"
+					) from e
+				now = time.perf_counter()
+				timings["wait"], mark = now - mark, now
+
+				if self.popup_only:
+					extracted = await page.evaluate(_POPUP_EXTRACT_JS)
+					if not extracted:
+						raise ValueError("未找到 .newItemPopup，可能页面结构变更或尚未渲染完成")
+					html = _compact_popup_html(extracted["popup"], extracted["image"])
+				else:
+					html = await page.content()
+				timings["content"] = time.perf_counter() - mark
+				return html, timings
+			finally:
+				await page.close()
+
+	def _fetch_http(self, url: str) -> Optional[_Fetched]:
+		"""直连 GET 并解析；拿不到完整弹窗时返回 None（由调用方回退到浏览器）。"""
+		assert self._session is not None
+		mark = time.perf_counter()
+		try:
+			resp = self._session.get(url, timeout=self.http_timeout_s)
+			resp.raise_for_status()
+		except requests.RequestException:
+			return None
+		# poedb 全站 utf-8；响应头没写 charset 时 requests 会按 ISO-8859-1 解码
+		resp.encoding = "utf-8"
+		html = resp.text
+		now = time.perf_counter()
+		timings = {"http": now - mark}
+		try:
+			lines, item = _parse_html(html, url, self.parser)
+		except ValueError:
+			return None
+		# 名称 + 至少一行内容 + 图片才算完整（lines 末尾是图片链接）
+		if len(lines) < 3 or not item.image_src:
+			return None
+		timings["parse"] = time.perf_counter() - now
+		return _Fetched(html=html, timings=timings, source="http", lines=lines, item=item)
+
+	async def _fetch_any(self, url: str) -> _Fetched:
+		http_timings: dict[str, float] = {}
+		if self.http_first:
+			mark = time.perf_counter()
+			fetched = await asyncio.get_running_loop().run_in_executor(self._http_pool, self._fetch_http, url)
+			if fetched is not None:
+				return fetched
+			http_timings["http"] = time.perf_counter() - mark
+		html, timings = await self._fetch_html(url)
+		return _Fetched(html=html, timings={**http_timings, **timings}, source="browser")
+
+	async def _shutdown(self) -> None:
+		if self._browser is not None:
+			await self._browser.close()
+			self._browser = None
+		if self._playwright is not None:
+			await self._playwright.stop()
+			self._playwright = None
+
+	def _from_cache(self, url: str) -> Optional[FetchResult]:
+		if self.cache is None:
+			return None
+		started = time.perf_counter()
+		entry = self.cache.get(url, force_refresh=self.force_refresh)
+		if entry is None:
+			return None
+		try:
+			lines, item = _parse_html(entry.read(), url, self.parser)
+		except Exception:
+			# 缓存内容损坏或解析器已更新导致失败时，回退到浏览器重新抓取
+			return None
+		elapsed = time.perf_counter() - started
+		return FetchResult(
+			url=url,
+			lines=lines,
+			elapsed_s=elapsed,
+			source="cache",
+			timings={"parse": elapsed},
+			html_bytes=entry.path.stat().st_size,
+			item=item,
+		)
+
+	def _finish(self, url: str, fut: Future, started: float) -> FetchResult:
+		try:
+			fetched: _Fetched = fut.result()
+			lines, item = fetched.lines, fetched.item
+			if lines is None or item is None:
+				mark = time.perf_counter()
+				lines, item = _parse_html(fetched.html, url, self.parser)
+				fetched.timings["parse"] = time.perf_counter() - mark
+		except Exception as e:
+			return FetchResult(url=url, error=e, elapsed_s=time.perf_counter() - started)
+		# 解析成功才写缓存，避免把不完整的页面缓存下来
+		if self.cache is not None:
+			self.cache.put(url, fetched.html)
+		return FetchResult(
+			url=url,
+			lines=lines,
+			elapsed_s=time.perf_counter() - started,
+			source=fetched.source,
+			timings=fetched.timings,
+			html_bytes=len(fetched.html.encode("utf-8")),
+			item=item,
+		)
+
+	def fetch_result(self, url: str) -> FetchResult:
+		"""抓取单个页面并返回 FetchResult（失败不抛异常）。"""
+		cached = self._from_cache(url)
+		if cached is not None:
+			return cached
+		return self._finish(url, self._submit(self._fetch_any(url)), time.perf_counter())
+
+	def fetch(self, url: str) -> list[str]:
+		"""抓取单个页面，返回值与 fetch_poedb_item_lines 相同；失败直接抛异常。"""
+		result = self.fetch_result(url)
+		if result.error is not None:
+			raise result.error
+		return result.lines
+
+	def fetch_item(self, url: str) -> ItemPopup:
+		"""抓取单个页面，返回结构化记录 ItemPopup；失败直接抛异常。"""
+		result = self.fetch_result(url)
+		if result.error is not None:
+			raise result.error
+		assert result.item is not None
+		return result.item
+
+	def fetch_many(self, urls: Iterable[str]) -> Iterator[FetchResult]:
+		"""批量抓取，按完成先后逐个产出 FetchResult（不保证与输入顺序一致）。
+
+		- 单个 URL 失败不会中断整个批次，错误记录在 FetchResult.error 里；
+		- 同一时刻最多挂起 concurrency * 2 个任务，urls 可以是惰性迭代器；
+		- 调用方提前结束迭代时，尚未完成的任务会被取消。
+		"""
+		pending: dict[Future, tuple[str, float]] = {}
+		url_iter = iter(urls)
+		max_inflight = self.concurrency * 2
+		exhausted = False
+		try:
+			while True:
+				while not exhausted and len(pending) < max_inflight:
+					try:
+						url = next(url_iter)
+					except StopIteration:
+						exhausted = True
+						break
+					cached = self._from_cache(url)
+					if cached is not None:
+						yield cached
+						continue
+					pending[self._submit(self._fetch_any(url))] = (url, time.perf_counter())
+				if not pending:
+					return
+				done, _ = wait(pending, return_when=FIRST_COMPLETED)
+				for fut in done:
+					url, started = pending.pop(fut)
+					yield self._finish(url, fut, started)
+		finally:
+			for fut in pending:
+				fut.cancel()
+
+	def close(self) -> None:
+		"""关闭浏览器并停止内部事件循环；可重复调用。"""
+		with self._lock:
+			if self._closed:
+				return
+			self._closed = True
+			loop, thread = self._loop, self._thread
+		if loop is None:
+			return
+		try:
+			asyncio.run_coroutine_threadsafe(self._shutdown(), loop).result()
+		finally:
+			loop.call_soon_threadsafe(loop.stop)
+			if thread is not None:
+				thread.join()
+			loop.close()
+			if self._http_pool is not None:
+				self._http_pool.shutdown(wait=True)
+			if self._session is not None:
+				self._session.close()
+
+
+def fetch_poedb_item_lines(
+	url: str,
+	*,
+	timeout_ms: int = 60000,
+	headless: bool = True,
+	cache: Optional[PoedbHtmlCache] = None,
+	force_refresh: bool = False,
+	fast: bool = False,
+	http_first: bool = False,
+	parser: str = DEFAULT_BACKEND,
+	popup_only: bool = False,
+) -> list[str]:
+	"""抓取 POEDB 页面，返回内容文本 list（最后一项为图片链接，如果能找到）。
+
+	传入 cache 且命中时不启动浏览器；未命中时单次调用会启动并关闭一个浏览器，
+	批量抓取请直接使用 PoedbFetcher。
+	"""
+	with PoedbFetcher(
+		concurrency=1,
+		timeout_ms=timeout_ms,
+		headless=headless,
+		cache=cache,
+		force_refresh=force_refresh,
+		fast=fast,
+		http_first=http_first,
+		parser=parser,
+		popup_only=popup_only,
+	) as fetcher:
+		return fetcher.fetch(url)
 
 
 if __name__ == "__main__":
     t = fetch_poedb_item_lines("https://poedb.tw/cn/Scroll_of_Wisdom")
     print(t)
+
+    # 对比普通模式、快速模式与直连 HTTP 的各步骤耗时
+    modes = (
+        ("normal", {}),
+        ("fast", {"fast": True}),
+        ("popup_only", {"fast": True, "popup_only": True}),
+        ("http", {"http_first": True}),
+    )
+    for name, options in modes:
+        with PoedbFetcher(concurrency=1, **options) as fetcher:
+            r = fetcher.fetch_result("https://poedb.tw/cn/Scroll_of_Wisdom")
+            print(name, r.source, f"{r.elapsed_s:.2f}s", f"{r.html_bytes}B", {k: round(v, 3) for k, v in r.timings.items()})
@@ -0,0 +1,219 @@
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Iterable, Iterator, Optional, Union
+
+from tool.poedb_parsers import LIMIT_RE, STACK_RE, PopupParts
+
+
+PathLike = Union[str, os.PathLike]
+
+
+@dataclass(slots=True)
+class ItemPopup:
+	"""一个 POEDB 物品弹窗的结构化记录，替代按下标取值的 lines 列表。
+
+	- category: 第一条普通属性（如“通货”）
+	- stack: 堆叠数量，如 "1/40"；limit: “限制: N”里的 N；没有时为空串
+	- properties: 除分类/堆叠/限制以外的其他属性行
+	- mods: 词缀行（explicitMod），affix 为它们按行拼接
+	"""
+
+	value: str
+	title: str
+	category: str = ""
+	stack: str = ""
+	limit: str = ""
+	properties: tuple[str, ...] = ()
+	mods: tuple[str, ...] = ()
+	desc: str = ""
+	en: str = ""
+	image_src: str = ""
+	fetched_at: float = field(default_factory=time.time)
+
+	@property
+	def affix(self) -> str:
+		return "\n".join(self.mods)
+
+	@classmethod
+	def from_parts(cls, value: str, parts: PopupParts) -> "ItemPopup":
+		category, stack, limit = "", "", ""
+		others: list[str] = []
+		for text in parts.properties:
+			m = STACK_RE.match(text)
+			if m:
+				stack = f"{m.group(2)}/{m.group(3)}"
+				continue
+			m = LIMIT_RE.match(text)
+			if m:
+				limit = m.group(1)
+				continue
+			if not category:
+				category = text
+				continue
+			others.append(text)
+		return cls(
+			value=value,
+			title=parts.name or "",
+			category=category,
+			stack=stack,
+			limit=limit,
+			properties=tuple(others),
+			mods=tuple(parts.mods),
+			desc=parts.desc,
+			en=parts.en,
+			image_src=parts.image_src,
+		)
+
+	def to_dict(self) -> dict[str, Any]:
+		d = asdict(self)
+		d["properties"] = list(self.properties)
+		d["mods"] = list(self.mods)
+		return d
+
+	@classmethod
+	def from_dict(cls, d: dict[str, Any]) -> "ItemPopup":
+		d = dict(d)
+		d["properties"] = tuple(d.get("properties") or ())
+		d["mods"] = tuple(d.get("mods") or ())
+		return cls(**d)
+
+
+_COLUMNS = (
+	"value", "title", "category", "stack", "limit_count", "properties", "mods", "desc", "en", "image_src", "fetched_at",
+)
+
+
+def _to_row(item: ItemPopup) -> tuple[Any, ...]:
+	return (
+		item.value,
+		item.title,
+		item.category,
+		item.stack,
+		item.limit,
+		json.dumps(item.properties, ensure_ascii=False),
+		json.dumps(item.mods, ensure_ascii=False),
+		item.desc,
+		item.en,
+		item.image_src,
+		item.fetched_at,
+	)
+
+
+def _from_row(row: tuple[Any, ...]) -> ItemPopup:
+	value, title, category, stack, limit, properties, mods, desc, en, image_src, fetched_at = row
+	return ItemPopup(
+		value=value,
+		title=title,
+		category=category,
+		stack=stack,
+		limit=limit,
+		properties=tuple(json.loads(properties)),
+		mods=tuple(json.loads(mods)),
+		desc=desc,
+		en=en,
+		image_src=image_src,
+		fetched_at=fetched_at,
+	)
+
+
+class ItemStore:
+	"""已抓取物品的本地 SQLite 仓库，按 poedb value 存取 ItemPopup。
+
+	用法：
+		with ItemStore("tmp/items.sqlite3") as store:
+			store.put(item)
+			for item in store.iter_items(category="通货"):
+				...
+
+	说明：
+	- 渲染/上传阶段直接从这里批量读取，不需要重新抓取或解析页面；
+	- put 为 upsert，重复抓取同一物品会覆盖旧记录；
+	- 线程安全，可在流水线的多个线程里共用。
+	"""
+
+	def __init__(self, db_path: PathLike = "tmp/items.sqlite3") -> None:
+		self.db_path = Path(db_path)
+		self.db_path.parent.mkdir(parents=True, exist_ok=True)
+		self._lock = threading.Lock()
+		self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+		self._conn.execute("PRAGMA journal_mode=WAL")
+		self._conn.execute(
+			"""
+			CREATE TABLE IF NOT EXISTS items (
+				value       TEXT PRIMARY KEY,
+				title       TEXT NOT NULL,
+				category    TEXT NOT NULL,
+				stack       TEXT NOT NULL,
+				limit_count TEXT NOT NULL,
+				properties  TEXT NOT NULL,
+				mods        TEXT NOT NULL,
+				desc        TEXT NOT NULL,
+				en          TEXT NOT NULL,
+				image_src   TEXT NOT NULL,
+				fetched_at  REAL NOT NULL
+			)
+			"""
+		)
+		self._conn.execute("CREATE INDEX IF NOT EXISTS items_category ON items (category)")
+		self._conn.commit()
+
+	def __enter__(self) -> "ItemStore":
+		return self
+
+	def __exit__(self, *exc: object) -> None:
+		self.close()
+
+	def close(self) -> None:
+		with self._lock:
+			self._conn.close()
+
+	def put(self, item: ItemPopup) -> None:
+		self.put_many([item])
+
+	def put_many(self, items: Iterable[ItemPopup]) -> int:
+		"""批量写入（一个事务），返回写入条数。"""
+		rows = [_to_row(item) for item in items]
+		placeholders = ", ".join("?" for _ in _COLUMNS)
+		with self._lock:
+			self._conn.executemany(
+				f"INSERT OR REPLACE INTO items ({', '.join(_COLUMNS)}) VALUES ({placeholders})", rows
+			)
+			self._conn.commit()
+		return len(rows)
+
+	def get(self, value: str) -> Optional[ItemPopup]:
+		with self._lock:
+			row = self._conn.execute(f"SELECT {', '.join(_COLUMNS)} FROM items WHERE value = ?", (value,)).fetchone()
+		return None if row is None else _from_row(row)
+
+	def iter_items(self, *, category: Optional[str] = None, batch_size: int = 500) -> Iterator[ItemPopup]:
+		"""按 value 顺序分批读取全部（或某个分类的）记录，内存只保留一批。"""
+		where, args = ("WHERE category = ?", [category]) if category is not None else ("", [])
+		last = ""
+		while True:
+			cond = f"{where} AND value > ?" if where else "WHERE value > ?"
+			with self._lock:
+				rows = self._conn.execute(
+					f"SELECT {', '.join(_COLUMNS)} FROM items {cond} ORDER BY value LIMIT ?",
+					(*args, last, batch_size),
+				).fetchall()
+			if not rows:
+				return
+			for row in rows:
+				yield _from_row(row)
+			last = rows[-1][0]
+
+	def __contains__(self, value: object) -> bool:
+		with self._lock:
+			return self._conn.execute("SELECT 1 FROM items WHERE value = ?", (value,)).fetchone() is not None
+
+	def __len__(self) -> int:
+		with self._lock:
+			return self._conn.execute("SELECT COUNT(*) FROM items").fetchone()[0]
@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+import re
+import threading
+from dataclasses import dataclass, field
+from functools import lru_cache
+
+
+# 这些标签前后的空白不影响排版，可以直接删掉；其余（行内元素之间）的空白压成一个空格
+_BLOCK_TAGS = frozenset({
+	"address", "article", "aside", "blockquote", "body", "br", "dd", "div", "dl", "dt", "figcaption", "figure",
+	"footer", "form", "h1", "h2", "h3", "h4", "h5", "h6", "head", "header", "hr", "html", "li", "link", "main",
+	"meta", "nav", "ol", "p", "section", "table", "tbody", "td", "tfoot", "th", "thead", "title", "tr", "ul",
+})
+
+_HTML_TOKEN_RE = re.compile(
+	r"(?P<keep><(?P<tag>pre|textarea|script|style)\b.*?</(?P=tag)\s*>)"
+	r"|(?P<comment><!--(?!\[if).*?-->)"
+	r"|(?<=>)(?P<ws>\s+)(?=<)",
+	re.S | re.I,
+)
+_TAG_NAME_RE = re.compile(r"</?([a-zA-Z][a-zA-Z0-9-]*)")
+
+
+def _tag_name(text: str) -> str:
+	"""text 以 "<" 开头时返回标签名（小写）；注释/doctype 返回 "!"。"""
+	if text.startswith("<!"):
+		return "!"
+	m = _TAG_NAME_RE.match(text)
+	return m.group(1).lower() if m else ""
+
+
+def _is_layout_neutral(name: str) -> bool:
+	return name == "!" or name in _BLOCK_TAGS
+
+
+def minify_html(html: str) -> str:
+	"""压缩 HTML：删注释、删块级标签之间的缩进换行。
+
+	只处理“标签与标签之间的纯空白”：块级标签旁边的直接删除，行内元素之间的压成一个空格
+	（保留词间距）；文本内容、属性值、${...} 占位符以及 pre/textarea/script/style 内部原样保留。
+	"""
+
+	def sub(m: re.Match[str]) -> str:
+		if m.group("keep"):
+			return m.group("keep")
+		if m.group("comment"):
+			return ""
+		prev = _tag_name(html[html.rfind("<", 0, m.start()):])
+		nxt = _tag_name(html[m.end():m.end() + 32])
+		return "" if _is_layout_neutral(prev) or _is_layout_neutral(nxt) else " "
+
+	return _HTML_TOKEN_RE.sub(sub, html).strip()
+
+
+# 字符串与 ${...} 占位符原样保留；注释删除
+_CSS_TOKEN_RE = re.compile(
+	r"(?P<keep>\"(?:\\.|[^\"\\])*\"|'(?:\\.|[^'\\])*'|\$\{[^}]*\})|(?P<comment>/\*.*?\*/)",
+	re.S,
+)
+
+
+def _squeeze_css(code: str) -> str:
+	code = re.sub(r"\s+", " ", code)
+	code = re.sub(r"\s*([{};,>])\s*", r"\1", code)
+	# 冒号前的空格可能是后代选择器（".a :hover"），只删冒号后的
+	code = re.sub(r":\s+", ":", code)
+	code = re.sub(r"\s*!\s*important", "!important", code)
+	code = code.replace(";}", "}")
+	# 0.86 → .86（前面是数字/字母/点/负号时不动）
+	return re.sub(r"(?<![\w.#-])0\.(\d)", r".\1", code)
+
+
+@lru_cache(maxsize=16)
+def minify_css(css: str) -> str:
+	"""压缩 CSS：删注释、压缩空白、去掉多余分号和前导 0。字符串与占位符内的内容不变。"""
+	out: list[str] = []
+	pos = 0
+	pending = ""
+	for m in _CSS_TOKEN_RE.finditer(css):
+		if m.group("comment"):
+			# 注释按空白处理，和后面的代码合在一起压缩
+			pending += css[pos:m.start()] + " "
+		else:
+			out.append(_squeeze_css(pending + css[pos:m.start()]))
+			out.append(m.group("keep"))
+			pending = ""
+		pos = m.end()
+	out.append(_squeeze_css(pending + css[pos:]))
+	return "".join(out).strip()
+
+
+def _utf8_len(text: str) -> int:
+	return len(text.encode("utf-8"))
+
+
+@dataclass
+class MinifyStats:
+	"""按类别（html/css）累计压缩前后的字节数，线程安全。"""
+
+	before: dict[str, int] = field(default_factory=dict)
+	after: dict[str, int] = field(default_factory=dict)
+	count: dict[str, int] = field(default_factory=dict)
+	_lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+	def add(self, kind: str, original: str, minified: str) -> str:
+		"""记录一次压缩并原样返回 minified，方便链式调用。"""
+		with self._lock:
+			self.before[kind] = self.before.get(kind, 0) + _utf8_len(original)
+			self.after[kind] = self.after.get(kind, 0) + _utf8_len(minified)
+			self.count[kind] = self.count.get(kind, 0) + 1
+		return minified
+
+	def summary(self) -> str:
+		with self._lock:
+			lines = []
+			for kind in sorted(self.before):
+				b, a = self.before[kind], self.after[kind]
+				pct = (b - a) * 100 / b if b else 0.0
+				lines.append(
+					f"{kind}: {self.count[kind]} 份，{b / 1e3:.1f} KB → {a / 1e3:.1f} KB，节省 {(b - a) / 1e3:.1f} KB（{pct:.1f}%）"
+				)
+			return "\n".join(lines) or "没有压缩记录"
@@ -0,0 +1,159 @@
+from __future__ import annotations
+
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Iterable, Iterator, Optional, Sequence
+
+
+# 阶段之间传递的结束标记
+_DONE = object()
+
+
+@dataclass
+class Stage:
+	"""流水线中的一个阶段。
+
+	- func: 接收上一阶段的输出，返回交给下一阶段的值
+	- workers: 该阶段的并发线程数（网络请求可以开多一些，限速上传保持 1）
+	- queue_size: 该阶段输入队列的容量，满了上游会阻塞（背压）；默认 workers * 2
+	"""
+
+	name: str
+	func: Callable[[Any], Any]
+	workers: int = 1
+	queue_size: int = 0
+
+
+@dataclass
+class PipelineResult:
+	"""单个输入走完流水线后的结果。
+
+	- index: 输入在原始序列中的下标（输出按完成先后产出，可用它对齐）
+	- value: 最后一个阶段的返回值；失败时为出错前最后一次成功的值
+	- error / failed_stage: 出错的异常与阶段名，出错后该条目跳过后续阶段
+	- timings: 每个已执行阶段的耗时（秒）
+	"""
+
+	index: int
+	item: Any
+	value: Any = None
+	error: Optional[BaseException] = None
+	failed_stage: Optional[str] = None
+	timings: dict[str, float] = field(default_factory=dict)
+
+	@property
+	def ok(self) -> bool:
+		return self.error is None
+
+
+class Pipeline:
+	"""分阶段并发流水线：阶段之间用有界队列连接，每个阶段有自己的线程数。
+
+	用法：
+		pipe = Pipeline([
+			Stage("fetch", fetch, workers=4),
+			Stage("convert", convert, workers=2),
+			Stage("upload", upload),
+		])
+		for r in pipe.run(items):
+			print(r.index, r.ok, r.value)
+
+	说明：
+	- 所有队列都有上限，慢阶段会把压力一路传回输入端，内存占用与总条目数无关；
+	- 单个条目出错不会中断整批，错误记录在 PipelineResult 里；
+	- 调用方提前结束迭代时，各阶段在处理完手头条目后退出。
+	"""
+
+	def __init__(self, stages: Sequence[Stage]) -> None:
+		if not stages:
+			raise ValueError("Pipeline 至少需要一个阶段")
+		for s in stages:
+			if s.workers < 1:
+				raise ValueError(f"阶段 {s.name} 的 workers 必须 >= 1，当前为 {s.workers}")
+		self.stages = list(stages)
+
+	def run(self, items: Iterable[Any]) -> Iterator[PipelineResult]:
+		stages = self.stages
+		stop = threading.Event()
+		queues: list[queue.Queue] = [queue.Queue(maxsize=s.queue_size or s.workers * 2) for s in stages]
+		queues.append(queue.Queue(maxsize=stages[-1].workers * 2))
+		remaining = [s.workers for s in stages]
+		remaining_lock = threading.Lock()
+		feeder_error: list[BaseException] = []
+
+		def put(q: queue.Queue, obj: Any) -> bool:
+			while not stop.is_set():
+				try:
+					q.put(obj, timeout=0.1)
+					return True
+				except queue.Full:
+					continue
+			return False
+
+		def get(q: queue.Queue) -> Any:
+			while not stop.is_set():
+				try:
+					return q.get(timeout=0.1)
+				except queue.Empty:
+					continue
+			return _DONE
+
+		def feeder() -> None:
+			try:
+				for index, item in enumerate(items):
+					if not put(queues[0], PipelineResult(index=index, item=item, value=item)):
+						return
+			except BaseException as e:
+				feeder_error.append(e)
+			finally:
+				for _ in range(stages[0].workers):
+					put(queues[0], _DONE)
+
+		def worker(i: int) -> None:
+			stage = stages[i]
+			inq, outq = queues[i], queues[i + 1]
+			while True:
+				job = get(inq)
+				if job is _DONE:
+					break
+				if job.error is None:
+					started = time.perf_counter()
+					try:
+						job.value = stage.func(job.value)
+					except Exception as e:
+						job.error = e
+						job.failed_stage = stage.name
+					job.timings[stage.name] = time.perf_counter() - started
+				if not put(outq, job):
+					return
+			# 本阶段最后一个线程退出时，通知下一阶段的所有线程
+			with remaining_lock:
+				remaining[i] -= 1
+				last = remaining[i] == 0
+			if last:
+				downstream = stages[i + 1].workers if i + 1 < len(stages) else 1
+				for _ in range(downstream):
+					put(outq, _DONE)
+
+		threads = [threading.Thread(target=feeder, name="pipeline-feeder", daemon=True)]
+		for i, s in enumerate(stages):
+			for n in range(s.workers):
+				threads.append(threading.Thread(target=worker, args=(i,), name=f"pipeline-{s.name}-{n}", daemon=True))
+		for t in threads:
+			t.start()
+
+		try:
+			while True:
+				job = get(queues[-1])
+				if job is _DONE:
+					break
+				yield job
+		finally:
+			stop.set()
+			for t in threads:
+				t.join()
+
+		if feeder_error:
+			raise feeder_error[0]
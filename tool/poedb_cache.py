@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional, Union
+
+
+PathLike = Union[str, os.PathLike]
+
+
+@dataclass(frozen=True)
+class CacheEntry:
+	"""缓存中的一条记录：URL → 内容哈希 + 抓取时间。"""
+
+	url: str
+	sha256: str
+	fetched_at: float
+	path: Path
+
+	@property
+	def age_s(self) -> float:
+		return time.time() - self.fetched_at
+
+	def read(self) -> str:
+		return self.path.read_text(encoding="utf-8")
+
+
+class PoedbHtmlCache:
+	"""按 URL 索引、按内容哈希落盘的 POEDB 页面 HTML 缓存。
+
+	目录结构：
+		<root>/index.sqlite3         URL → sha256 / fetched_at
+		<root>/blobs/ab/abcdef....html  内容本身（相同内容只存一份）
+
+	说明：
+	- ttl_s 为 None 表示永不过期；过期的记录 get() 返回 None，由调用方重新抓取后 put()；
+	- 重新抓取到的内容哈希不变时只刷新 fetched_at（即“重新验证”），不会重写文件；
+	- 线程安全，可在流水线的多个抓取线程里共用。
+	"""
+
+	def __init__(self, root: PathLike = "tmp/poedb_cache", *, ttl_s: Optional[float] = 7 * 24 * 3600) -> None:
+		self.root = Path(root)
+		self.blob_dir = self.root / "blobs"
+		self.blob_dir.mkdir(parents=True, exist_ok=True)
+		self.ttl_s = ttl_s
+		self._lock = threading.Lock()
+		self._conn = sqlite3.connect(str(self.root / "index.sqlite3"), check_same_thread=False)
+		self._conn.execute(
+			"""
+			CREATE TABLE IF NOT EXISTS pages (
+				url        TEXT PRIMARY KEY,
+				sha256     TEXT NOT NULL,
+				fetched_at REAL NOT NULL
+			)
+			"""
+		)
+		self._conn.commit()
+
+	def __enter__(self) -> "PoedbHtmlCache":
+		return self
+
+	def __exit__(self, *exc: object) -> None:
+		self.close()
+
+	def close(self) -> None:
+		with self._lock:
+			self._conn.close()
+
+	def _blob_path(self, sha256: str) -> Path:
+		return self.blob_dir / sha256[:2] / f"{sha256}.html"
+
+	def lookup(self, url: str) -> Optional[CacheEntry]:
+		"""不考虑 TTL，返回 URL 对应的记录；没有记录或文件丢失时返回 None。"""
+		with self._lock:
+			row = self._conn.execute("SELECT sha256, fetched_at FROM pages WHERE url = ?", (url,)).fetchone()
+		if row is None:
+			return None
+		entry = CacheEntry(url=url, sha256=row[0], fetched_at=row[1], path=self._blob_path(row[0]))
+		if not entry.path.exists():
+			return None
+		return entry
+
+	def get(self, url: str, *, ttl_s: Optional[float] = None, force_refresh: bool = False) -> Optional[CacheEntry]:
+		"""返回未过期的记录；force_refresh=True 或已过期时返回 None。
+
+		ttl_s 不传时使用实例的默认 TTL（想临时忽略过期可传 float("inf")）。
+		"""
+		if force_refresh:
+			return None
+		entry = self.lookup(url)
+		if entry is None:
+			return None
+		ttl = self.ttl_s if ttl_s is None else ttl_s
+		if ttl is not None and entry.age_s > ttl:
+			return None
+		return entry
+
+	def put(self, url: str, html: str) -> CacheEntry:
+		"""写入（或重新验证）一条记录，返回新的 CacheEntry。"""
+		data = html.encode("utf-8")
+		sha256 = hashlib.sha256(data).hexdigest()
+		path = self._blob_path(sha256)
+		if not path.exists():
+			path.parent.mkdir(parents=True, exist_ok=True)
+			tmp = path.with_name(f"{path.name}.{threading.get_ident()}.tmp")
+			tmp.write_bytes(data)
+			os.replace(tmp, path)
+		now = time.time()
+		with self._lock:
+			self._conn.execute(
+				"""
+				INSERT INTO pages (url, sha256, fetched_at) VALUES (?, ?, ?)
+				ON CONFLICT (url) DO UPDATE SET sha256 = excluded.sha256, fetched_at = excluded.fetched_at
+				""",
+				(url, sha256, now),
+			)
+			self._conn.commit()
+		return CacheEntry(url=url, sha256=sha256, fetched_at=now, path=path)
+
+	def invalidate(self, url: str) -> None:
+		"""删除 URL 的索引记录（内容文件可能被其他 URL 共用，保留不删）。"""
+		with self._lock:
+			self._conn.execute("DELETE FROM pages WHERE url = ?", (url,))
+			self._conn.commit()
+
+	def __len__(self) -> int:
+		with self._lock:
+			return self._conn.execute("SELECT COUNT(*) FROM pages").fetchone()[0]
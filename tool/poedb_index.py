@@ -0,0 +1,235 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import pickle
+import sys
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Iterable, Optional, Union
+
+
+PathLike = Union[str, os.PathLike]
+
+DEFAULT_SOURCE = "data/20260106poedb.json"
+DEFAULT_INDEX = "tmp/poedb_index.pickle"
+
+# 索引格式变化时递增，旧文件自动重建
+_FORMAT = 1
+
+# 列存里表示“该条目没有这个字段”
+_MISSING = None
+
+
+def _norm(label: str) -> str:
+	# 原始 label 里有前导空格（如 " 暴虐之灵"），英文按不区分大小写匹配
+	return label.strip().casefold()
+
+
+class PoedbIndex:
+	"""poedb 条目列表（label/value/desc/class）的预建索引。
+
+	- 条目按列存（每个字段一个字符串列表），加载比一堆 dict 快，查询结果再拼回 dict；
+	- desc/class 精确查找：dict → 条目下标列表；value 大多唯一，唯一的直接存下标；
+	- label 前缀：按规范化 label 排好序的列表上二分；
+	- label 子串：所有规范化 label 用换行拼成一个大字符串，str.find 扫描后按偏移量二分回条目。
+
+	用法：
+		index = load_index()
+		items = index.query(desc="可堆叠通货")
+		items = index.query(cls="item_currency", contains="石")
+	"""
+
+	def __init__(self, entries: list[dict[str, Any]], *, source_stamp: tuple[int, int] = (0, 0)) -> None:
+		self.source_stamp = source_stamp
+		self.size = len(entries)
+		keys: list[str] = []
+		for e in entries:
+			keys.extend(k for k in e if k not in keys)
+		# 缺失的字段记为 _MISSING，拼回 dict 时省略
+		self.columns: dict[str, list[Any]] = {k: [e.get(k, _MISSING) for e in entries] for k in keys}
+
+		by_desc: dict[str, list[int]] = defaultdict(list)
+		by_class: dict[str, list[int]] = defaultdict(list)
+		by_value: dict[str, Any] = {}
+		for i, e in enumerate(entries):
+			by_desc[str(e.get("desc", ""))].append(i)
+			by_class[str(e.get("class", ""))].append(i)
+			v = str(e.get("value", ""))
+			prev = by_value.get(v)
+			if prev is None:
+				by_value[v] = i
+			elif isinstance(prev, list):
+				prev.append(i)
+			else:
+				by_value[v] = [prev, i]
+		self.by_desc, self.by_class, self.by_value = dict(by_desc), dict(by_class), by_value
+
+		labels = [_norm(str(e.get("label", ""))).replace("\n", " ") for e in entries]
+		# 前缀查找用：(规范化 label, 下标) 升序
+		self.sorted_labels: list[tuple[str, int]] = sorted((label, i) for i, label in enumerate(labels))
+		# 子串查找用：拼接后的大字符串与每条 label 的起始偏移
+		self.haystack = "\n".join(labels)
+		self.offsets: list[int] = []
+		pos = 0
+		for label in labels:
+			self.offsets.append(pos)
+			pos += len(label) + 1
+
+	def __len__(self) -> int:
+		return self.size
+
+	def entry(self, i: int) -> dict[str, Any]:
+		return {k: col[i] for k, col in self.columns.items() if col[i] is not _MISSING}
+
+	def _prefix(self, prefix: str) -> list[int]:
+		prefix = _norm(prefix)
+		start = bisect_left(self.sorted_labels, (prefix, -1))
+		out: list[int] = []
+		for label, i in self.sorted_labels[start:]:
+			if not label.startswith(prefix):
+				break
+			out.append(i)
+		return out
+
+	def _contains(self, text: str) -> list[int]:
+		text = _norm(text)
+		if not text:
+			return list(range(self.size))
+		if "\n" in text:
+			return []
+		out: list[int] = []
+		pos = self.haystack.find(text)
+		while pos != -1:
+			i = bisect_right(self.offsets, pos) - 1
+			out.append(i)
+			# 同一条 label 里只记一次：直接跳到下一条的开头继续找
+			nxt = self.offsets[i + 1] if i + 1 < self.size else len(self.haystack)
+			pos = self.haystack.find(text, nxt)
+		return out
+
+	def _value(self, value: str) -> list[int]:
+		hit = self.by_value.get(value)
+		if hit is None:
+			return []
+		return hit if isinstance(hit, list) else [hit]
+
+	def query(
+		self,
+		*,
+		desc: Optional[str] = None,
+		cls: Optional[str] = None,
+		value: Optional[str] = None,
+		prefix: Optional[str] = None,
+		contains: Optional[str] = None,
+		limit: Optional[int] = None,
+	) -> list[dict[str, Any]]:
+		"""按条件（取交集）查条目，结果保持原始数据顺序；不给任何条件时返回全部。"""
+		selected: Optional[set[int]] = None
+		for hits in (
+			None if desc is None else self.by_desc.get(desc, []),
+			None if cls is None else self.by_class.get(cls, []),
+			None if value is None else self._value(value),
+			None if prefix is None else self._prefix(prefix),
+			None if contains is None else self._contains(contains),
+		):
+			if hits is None:
+				continue
+			selected = set(hits) if selected is None else selected.intersection(hits)
+		indices: Iterable[int] = range(self.size) if selected is None else sorted(selected)
+		out = [self.entry(i) for i in indices]
+		return out if limit is None else out[:limit]
+
+	def counts(self, field: str) -> dict[str, int]:
+		"""某个字段（desc/class）的取值与条目数，按数量降序。"""
+		table = {"desc": self.by_desc, "class": self.by_class}[field]
+		return dict(sorted(((k, len(v)) for k, v in table.items()), key=lambda kv: -kv[1]))
+
+	@classmethod
+	def _from_state(cls, state: dict[str, Any]) -> "PoedbIndex":
+		index = cls.__new__(cls)
+		index.__dict__.update(state)
+		return index
+
+	def save(self, path: PathLike = DEFAULT_INDEX) -> None:
+		path = Path(path)
+		path.parent.mkdir(parents=True, exist_ok=True)
+		tmp = path.with_name(path.name + ".tmp")
+		with open(tmp, "wb") as f:
+			# 只存属性字典（内置类型）：python -m 运行时类属于 __main__，直接 pickle 实例会读不回来
+			pickle.dump((_FORMAT, vars(self)), f, protocol=pickle.HIGHEST_PROTOCOL)
+		os.replace(tmp, path)
+
+
+def _stamp(path: PathLike) -> tuple[int, int]:
+	st = os.stat(path)
+	return st.st_mtime_ns, st.st_size
+
+
+def build_index(source: PathLike = DEFAULT_SOURCE) -> PoedbIndex:
+	with open(source, "r", encoding="utf-8") as f:
+		data = json.load(f)
+	if not isinstance(data, list):
+		raise ValueError(f"文件 {source} 内容不是列表")
+	return PoedbIndex(data, source_stamp=_stamp(source))
+
+
+def load_index(
+	source: PathLike = DEFAULT_SOURCE,
+	index_path: PathLike = DEFAULT_INDEX,
+	*,
+	rebuild: bool = False,
+) -> PoedbIndex:
+	"""加载预建索引；索引不存在、格式过旧或源 JSON 有改动（mtime/大小）时重新构建并保存。
+
+	索引用 pickle 保存，只加载本工具自己生成的本地文件。
+	"""
+	stamp = _stamp(source)
+	if not rebuild:
+		try:
+			with open(index_path, "rb") as f:
+				fmt, state = pickle.load(f)
+			if fmt == _FORMAT and state["source_stamp"] == stamp:
+				return PoedbIndex._from_state(state)
+		except (FileNotFoundError, EOFError, pickle.UnpicklingError, ValueError, TypeError, KeyError):
+			pass
+	index = build_index(source)
+	index.save(index_path)
+	return index
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+	parser = argparse.ArgumentParser(description="查询 poedb 条目索引（首次运行或源文件更新时自动构建）")
+	parser.add_argument("--source", default=DEFAULT_SOURCE, help="poedb 条目 JSON")
+	parser.add_argument("--index", default=DEFAULT_INDEX, help="索引文件路径")
+	parser.add_argument("--rebuild", action="store_true", help="强制重建索引")
+	parser.add_argument("--desc", help="按 desc 精确匹配，如 可堆叠通货")
+	parser.add_argument("--class", dest="cls", help="按 class 精确匹配，如 item_currency")
+	parser.add_argument("--value", help="按 value 精确匹配")
+	parser.add_argument("--prefix", help="label 前缀")
+	parser.add_argument("--contains", help="label 子串")
+	parser.add_argument("--limit", type=int, default=None, help="最多输出条数")
+	parser.add_argument("--count", action="store_true", help="只输出匹配条数")
+	parser.add_argument("--facets", choices=("desc", "class"), help="列出该字段的全部取值及条目数")
+	args = parser.parse_args(argv)
+
+	index = load_index(args.source, args.index, rebuild=args.rebuild)
+	if args.facets:
+		for key, n in index.counts(args.facets).items():
+			print(f"{n:>6}  {key or '(空)'}")
+		return 0
+	hits = index.query(
+		desc=args.desc, cls=args.cls, value=args.value, prefix=args.prefix, contains=args.contains, limit=args.limit
+	)
+	if args.count:
+		print(len(hits))
+		return 0
+	for e in hits:
+		print(json.dumps(e, ensure_ascii=False))
+	return 0
+
+
+if __name__ == "__main__":
+	sys.exit(main())
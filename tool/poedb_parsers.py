@@ -0,0 +1,358 @@
+from __future__ import annotations
+
+import re
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Any, Iterator, Optional
+
+
+# get_text 不收集这些标签里的文本（与 beautifulsoup4>=4.12 的行为一致）
+_SKIP_TEXT_TAGS = frozenset({"script", "style", "template"})
+
+# 弹窗属性行：“限制: 1”、“堆叠数量: 1/40”（冒号和空格可有可无）
+LIMIT_RE = re.compile(r"^限制\s*:?\s*(\d+)\s*$")
+STACK_RE = re.compile(r"^(堆叠数量)\s*:?\s*(\d+)\s*/\s*(\d+)$")
+
+# 只支持本模块用到的简单选择器：由空格分隔的若干段，每段为 tag / .class / tag.class.class
+_COMPOUND_RE = re.compile(r"^([a-zA-Z][a-zA-Z0-9]*|\*)?((?:\.[A-Za-z0-9_-]+)*)$")
+
+
+def _join_text(strings: Iterator[str], separator: str) -> str:
+	"""等价于 bs4 的 get_text(separator, strip=True)：逐段 strip，丢弃空段后拼接。"""
+	parts = []
+	for s in strings:
+		s = s.strip()
+		if s:
+			parts.append(s)
+	return separator.join(parts)
+
+
+class ParserBackend(ABC):
+	"""HTML 解析后端接口。
+
+	extract_lines_and_image 只通过这几个方法访问文档树，保证不同后端走完全相同的抽取逻辑：
+	- parse: 解析整页/片段，返回根节点
+	- select_one / select: 在节点的后代里按简单 CSS 选择器查找（文档顺序）
+	- text: 等价于 bs4 的 get_text(separator, strip=True)
+	- attr / parent / child_divs: 取属性、父节点、直接子 div
+	"""
+
+	name = ""
+
+	@abstractmethod
+	def parse(self, html: str) -> Any:
+		...
+
+	@abstractmethod
+	def select_one(self, node: Any, selector: str) -> Any:
+		...
+
+	@abstractmethod
+	def select(self, node: Any, selector: str) -> list[Any]:
+		...
+
+	@abstractmethod
+	def text(self, node: Any, separator: str = "") -> str:
+		...
+
+	@abstractmethod
+	def attr(self, node: Any, name: str) -> Optional[str]:
+		...
+
+	@abstractmethod
+	def parent(self, node: Any) -> Any:
+		...
+
+	@abstractmethod
+	def child_divs(self, node: Any) -> list[Any]:
+		...
+
+
+class Bs4Backend(ParserBackend):
+	"""beautifulsoup4 + html.parser（原实现，作为基准）。"""
+
+	name = "bs4"
+
+	def __init__(self) -> None:
+		try:
+			from bs4 import BeautifulSoup  # type: ignore[import-not-found]
+		except ImportError as e:
+			raise ImportError("缺少依赖 beautifulsoup4，请先安装 requirements.txt") from e
+		self._soup_cls = BeautifulSoup
+
+	def parse(self, html: str) -> Any:
+		return self._soup_cls(html, "html.parser")
+
+	def select_one(self, node: Any, selector: str) -> Any:
+		return node.select_one(selector)
+
+	def select(self, node: Any, selector: str) -> list[Any]:
+		return node.select(selector)
+
+	def text(self, node: Any, separator: str = "") -> str:
+		return node.get_text(separator, strip=True)
+
+	def attr(self, node: Any, name: str) -> Optional[str]:
+		value = node.get(name)
+		return None if value is None else str(value)
+
+	def parent(self, node: Any) -> Any:
+		return node.parent
+
+	def child_divs(self, node: Any) -> list[Any]:
+		return node.find_all("div", recursive=False)
+
+
+def _selector_to_xpath(selector: str) -> str:
+	steps = []
+	for compound in selector.split():
+		m = _COMPOUND_RE.match(compound)
+		if not m:
+			raise ValueError(f"不支持的选择器: {selector!r}")
+		tag = m.group(1) or "*"
+		preds = "".join(
+			f"[contains(concat(' ', normalize-space(@class), ' '), ' {cls} ')]"
+			for cls in m.group(2).split(".")
+			if cls
+		)
+		steps.append(tag + preds)
+	return ".//" + "//".join(steps)
+
+
+class LxmlBackend(ParserBackend):
+	"""lxml.html：C 实现的解析器，选择器翻译成 XPath 并缓存编译结果。"""
+
+	name = "lxml"
+
+	def __init__(self) -> None:
+		try:
+			import lxml.etree  # type: ignore[import-not-found]
+			import lxml.html  # type: ignore[import-not-found]
+		except ImportError as e:
+			raise ImportError("缺少依赖 lxml，请先安装：pip install lxml") from e
+		self._etree = lxml.etree
+		self._html = lxml.html
+		self._xpaths: dict[str, Any] = {}
+
+	def _xpath(self, selector: str) -> Any:
+		xp = self._xpaths.get(selector)
+		if xp is None:
+			xp = self._xpaths[selector] = self._etree.XPath(_selector_to_xpath(selector))
+		return xp
+
+	def parse(self, html: str) -> Any:
+		if not html.strip():
+			raise ValueError("HTML 为空")
+		return self._html.document_fromstring(html)
+
+	def select_one(self, node: Any, selector: str) -> Any:
+		found = self._xpath(selector)(node)
+		return found[0] if found else None
+
+	def select(self, node: Any, selector: str) -> list[Any]:
+		return self._xpath(selector)(node)
+
+	def _strings(self, node: Any) -> Iterator[str]:
+		if node.text:
+			yield node.text
+		for child in node:
+			# 注释/处理指令的 tag 不是 str：跳过其内容，但保留 tail
+			if isinstance(child.tag, str) and child.tag not in _SKIP_TEXT_TAGS:
+				yield from self._strings(child)
+			if child.tail:
+				yield child.tail
+
+	def text(self, node: Any, separator: str = "") -> str:
+		return _join_text(self._strings(node), separator)
+
+	def attr(self, node: Any, name: str) -> Optional[str]:
+		return node.get(name)
+
+	def parent(self, node: Any) -> Any:
+		return node.getparent()
+
+	def child_divs(self, node: Any) -> list[Any]:
+		return [child for child in node if child.tag == "div"]
+
+
+class SelectolaxBackend(ParserBackend):
+	"""selectolax（lexbor 引擎）：原生 CSS 选择器，解析最快。"""
+
+	name = "selectolax"
+
+	def __init__(self) -> None:
+		try:
+			from selectolax.lexbor import LexborHTMLParser  # type: ignore[import-not-found]
+		except ImportError as e:
+			raise ImportError("缺少依赖 selectolax，请先安装：pip install selectolax") from e
+		self._parser_cls = LexborHTMLParser
+
+	def parse(self, html: str) -> Any:
+		return self._parser_cls(html).root
+
+	def select_one(self, node: Any, selector: str) -> Any:
+		return node.css_first(selector)
+
+	def select(self, node: Any, selector: str) -> list[Any]:
+		return node.css(selector)
+
+	def _strings(self, node: Any) -> Iterator[str]:
+		child = node.child
+		while child is not None:
+			tag = child.tag
+			if tag == "-text":
+				yield child.text_content or ""
+			elif not tag.startswith(("-", "_", "!")) and tag not in _SKIP_TEXT_TAGS:
+				# 以 -/_/! 开头的是注释、doctype 等非元素节点
+				yield from self._strings(child)
+			child = child.next
+
+	def text(self, node: Any, separator: str = "") -> str:
+		return _join_text(self._strings(node), separator)
+
+	def attr(self, node: Any, name: str) -> Optional[str]:
+		return node.attributes.get(name)
+
+	def parent(self, node: Any) -> Any:
+		return node.parent
+
+	def child_divs(self, node: Any) -> list[Any]:
+		return [child for child in node.iter() if child.tag == "div"]
+
+
+BACKENDS: dict[str, type[ParserBackend]] = {
+	Bs4Backend.name: Bs4Backend,
+	LxmlBackend.name: LxmlBackend,
+	SelectolaxBackend.name: SelectolaxBackend,
+}
+DEFAULT_BACKEND = Bs4Backend.name
+
+_instances: dict[str, ParserBackend] = {}
+
+
+def get_backend(name: str = DEFAULT_BACKEND) -> ParserBackend:
+	"""按名称取解析后端（实例会缓存复用）；依赖缺失时抛 ImportError。"""
+	backend = _instances.get(name)
+	if backend is None:
+		try:
+			cls = BACKENDS[name]
+		except KeyError:
+			raise ValueError(f"未知的解析后端: {name!r}，可选: {', '.join(BACKENDS)}") from None
+		backend = _instances[name] = cls()
+	return backend
+
+
+def available_backends() -> list[str]:
+	"""返回当前环境里依赖已安装、可以使用的后端名称。"""
+	names = []
+	for name in BACKENDS:
+		try:
+			get_backend(name)
+		except ImportError:
+			continue
+		names.append(name)
+	return names
+
+
+@dataclass
+class PopupParts:
+	"""弹窗里抽出的原始块，尚未按下游需要做过滤/拆分。
+
+	- name: .itemName .lc 的文本；没有该节点时为 None
+	- properties: .Stats .property 的非空文本（含“限制”“堆叠数量”等原样）
+	- mods: .Stats .explicitMod 的非空文本
+	- desc: .default 的文本（保留换行），en: .content 最后一个子 div 的文本
+	"""
+
+	name: Optional[str]
+	properties: list[str]
+	mods: list[str]
+	desc: str
+	en: str
+	image_src: str
+
+
+def extract_popup_parts(html: str, backend: str = DEFAULT_BACKEND) -> PopupParts:
+	"""从 POEDB 页面（或只含弹窗的片段）抽取弹窗各块的文本与图片链接。"""
+	b = get_backend(backend)
+	root = b.parse(html)
+
+	# 注意不能用 `or` 串联：lxml 元素的真假值取决于是否有子节点
+	popup = b.select_one(root, "div.newItemPopup.currencyPopup")
+	if popup is None:
+		popup = b.select_one(root, "div.newItemPopup")
+	if popup is None:
+		raise ValueError("未找到 .newItemPopup，可能页面结构变更或尚未渲染完成")
+
+	# 同组图片一般位于 popup 的祖先容器中
+	image_src = ""
+	container = popup
+	for _ in range(6):
+		img = b.select_one(container, "div.itemboximage img")
+		if img is not None:
+			src = b.attr(img, "src")
+			if src:
+				image_src = src
+				break
+		parent = b.parent(container)
+		if parent is None:
+			break
+		container = parent
+
+	name_node = b.select_one(popup, ".itemName .lc")
+	name = None if name_node is None else b.text(name_node)
+
+	properties = [t for t in (b.text(prop, " ") for prop in b.select(popup, ".Stats .property")) if t]
+	mods = [t for t in (b.text(mod, " ") for mod in b.select(popup, ".Stats .explicitMod")) if t]
+
+	desc = ""
+	default_desc = b.select_one(popup, ".default")
+	if default_desc is not None:
+		# 保留换行（你示例里需要把 Shift 那行保留下来）
+		desc = b.text(default_desc, "\n")
+
+	# 英文名（示例中在 content 下的最后一个 div）
+	en = ""
+	content = b.select_one(popup, ".content")
+	if content is not None:
+		divs = b.child_divs(content)
+		if divs:
+			en = b.text(divs[-1], " ")
+
+	return PopupParts(name=name, properties=properties, mods=mods, desc=desc, en=en, image_src=image_src)
+
+
+def lines_from_parts(parts: PopupParts) -> list[str]:
+	"""按页面展示顺序把弹窗各块拼成文本行（不含图片链接）。"""
+	lines: list[str] = []
+	if parts.name is not None:
+		lines.append(parts.name)
+
+	for text in parts.properties:
+		# 货币类弹窗里偶尔会出现“限制: 1”等属性，这会导致返回列表下标整体后移。
+		# 下游逻辑按固定位置取值，因此这里过滤掉该行。
+		# 过滤不稳定/不需要的属性行：例如“限制: 1”（不同物品可能是其他数字）
+		if LIMIT_RE.match(text):
+			continue
+		# 例：堆叠数量: 1/40（或 1 / 40） -> 拆成两项：
+		# - 堆叠数量
+		# - 1/40
+		m = STACK_RE.match(text)
+		if m:
+			lines.append(m.group(1))
+			lines.append(f"{m.group(2)}/{m.group(3)}")
+			continue
+		lines.append(text)
+
+	lines.extend(parts.mods)
+	if parts.desc:
+		lines.append(parts.desc)
+	if parts.en:
+		lines.append(parts.en)
+	return lines
+
+
+def extract_lines_and_image(html: str, backend: str = DEFAULT_BACKEND) -> tuple[list[str], str]:
+	"""从 POEDB 页面（或只含弹窗的片段）抽取内容文本行与图片链接。"""
+	parts = extract_popup_parts(html, backend)
+	return lines_from_parts(parts), parts.image_src
@@ -1,10 +1,160 @@
 from __future__ import annotations
 
 import os
+import re
+import threading
+import time
 from pathlib import Path
 from string import Template
+from typing import Any, Iterable, Iterator, Mapping
 
 
+# 模板里的图标 <img>；使用图集时整个替换成带 sprite class 的 <span>
+_ICON_IMG_RE = re.compile(r'<img\s+class="card__iconImg"[^>]*/?>')
+
+
+_FIELDS = ("title", "category", "stack", "affix", "desc_html", "en", "icon_url")
+
+
+class _FileCache:
+    """按 mtime 缓存的文本文件；检查间隔内不重复 stat。"""
+
+    def __init__(self, path: str | os.PathLike[str], check_interval_s: float) -> None:
+        self.path = Path(path)
+        self.check_interval_s = check_interval_s
+        self._mtime: float | None = None
+        self._checked_at = float("-inf")
+        self._text = ""
+        self.loads = 0
+
+    def text(self) -> str:
+        now = time.monotonic()
+        if now - self._checked_at < self.check_interval_s:
+            return self._text
+        self._checked_at = now
+        try:
+            mtime = self.path.stat().st_mtime
+        except FileNotFoundError:
+            raise FileNotFoundError(self.path) from None
+        if mtime != self._mtime:
+            self._text = self.path.read_text(encoding="utf-8")
+            self._mtime = mtime
+            self.loads += 1
+        return self._text
+
+
+class ItemPopupRenderer:
+    """物品弹窗渲染器：模板只编译一次（文件 mtime 变了才重新编译），CSS 同样缓存。
+
+    用法：
+        renderer = ItemPopupRenderer()
+        html = renderer.render(title=..., category=..., ...)      # 内存里渲染
+        css = renderer.css()
+        for html in renderer.render_many(rows, out_dir="tmp"):    # 批量，可选落盘
+            ...
+
+    线程安全；check_interval_s 内不再检查文件是否变化（0 表示每次都检查）。
+    """
+
+    def __init__(
+        self,
+        template_path: str | os.PathLike[str] = "template/Item/item_popup.html",
+        css_path: str | os.PathLike[str] = "template/Item/item_popup.css",
+        *,
+        check_interval_s: float = 1.0,
+    ) -> None:
+        self._template_file = _FileCache(template_path, check_interval_s)
+        self._css_file = _FileCache(css_path, check_interval_s)
+        self._lock = threading.Lock()
+        self._compiled_from: str | None = None
+        self._compiled: dict[bool, Template] = {}
+
+    @property
+    def template_path(self) -> Path:
+        return self._template_file.path
+
+    def _template(self, sprite: bool) -> Template:
+        with self._lock:
+            text = self._template_file.text()
+            if text is not self._compiled_from:
+                # 普通版和图集版各编译一份；图集版把 <img> 换成带 ${sprite_class} 的 <span>
+                sprite_text = _ICON_IMG_RE.sub(
+                    '<span class="card__iconImg sprite ${sprite_class}" role="img" aria-label="${title}"></span>',
+                    text,
+                )
+                self._compiled = {False: Template(text), True: Template(sprite_text)}
+                self._compiled_from = text
+            return self._compiled[sprite]
+
+    def css(self) -> str:
+        with self._lock:
+            return self._css_file.text()
+
+    def parameterized(self, param: str = "{{{%s}}}") -> str:
+        """把占位符换成 wiki 模板参数（默认 {{{title}}} 这种写法），得到一个通用的参数化模板。"""
+        return self._template(False).safe_substitute({name: param % name for name in _FIELDS})
+
+    def render(
+        self,
+        *,
+        title: str,
+        category: str,
+        stack: str,
+        affix: str,
+        desc_html: str,
+        en: str,
+        icon_url: str,
+        sprite_class: str | None = None,
+    ) -> str:
+        """在内存里渲染一张卡片，返回 HTML 字符串（参数含义同 render_item_popup）。"""
+        # 这些字段全部必传；这里统一转成 str，避免传入 None/数字时报错
+        safe = {
+            "title": str(title),
+            "category": str(category),
+            "stack": str(stack),
+            "affix": str(affix),
+            "desc_html": str(desc_html),
+            "en": str(en),
+            "icon_url": str(icon_url),
+        }
+        if sprite_class:
+            safe["sprite_class"] = sprite_class
+        # 用 safe_substitute，模板里多出的占位符原样保留而不是抛错
+        return self._template(bool(sprite_class)).safe_substitute(safe)
+
+    def render_many(
+        self,
+        rows: Iterable[Mapping[str, Any]],
+        *,
+        out_dir: str | os.PathLike[str] | None = None,
+    ) -> Iterator[str]:
+        """逐个渲染 rows（每个是 render 的关键字参数），惰性产出 HTML。
+
+        out_dir 不为空时同时写出 out_dir/<en>.html。
+        """
+        outp = None if out_dir is None else Path(out_dir)
+        if outp is not None:
+            outp.mkdir(parents=True, exist_ok=True)
+        for row in rows:
+            html = self.render(**{k: row[k] for k in _FIELDS}, sprite_class=row.get("sprite_class"))
+            if outp is not None:
+                (outp / f"{row['en']}.html").write_text(html, encoding="utf-8")
+            yield html
+
+
+_renderers: dict[Path, ItemPopupRenderer] = {}
+_renderers_lock = threading.Lock()
+
+
+def get_renderer(template_path: str | os.PathLike[str] = "template/Item/item_popup.html") -> ItemPopupRenderer:
+    """返回该模板的共享渲染器（CSS 取模板同目录下的同名 .css）。"""
+    key = Path(template_path).resolve()
+    with _renderers_lock:
+        renderer = _renderers.get(key)
+        if renderer is None:
+            renderer = _renderers[key] = ItemPopupRenderer(template_path, Path(template_path).with_suffix(".css"))
+        return renderer
+
 
 def render_item_popup(
     template_path: str | os.PathLike[str],
@@ -17,36 +167,36 @@ def render_item_popup(
     en: str,
     icon_url: str,
     out_path: str | os.PathLike[str],
+    sprite_class: str | None = None,
 ) -> str:
     """从模板加载 `item_popup.html`，用必填参数填充占位符，并保存为 HTML 文件。
 
     必填参数（对应模板占位符）：
         - title, category, stack, affix, desc_html, en, icon_url
 
+    可选：
+        - sprite_class: 图集里该图标的 CSS class（见 tool/sprite_atlas.py）。传入时不再引用
+          icon_url 单独的图片，改用图集背景图，页面需同时引入图集 CSS。
+
     返回：输出文件路径（str）。
+
+    模板经 get_renderer 缓存；只需要 HTML 字符串时直接用 ItemPopupRenderer.render。
     """
 
     tmpl_path = Path(template_path)
     if not tmpl_path.exists():
         raise FileNotFoundError(tmpl_path)
 
-    text = tmpl_path.read_text(encoding="utf-8")
-
-    # 这些字段全部必传；这里统一转成 str，避免传入 None/数字时报错
-    safe = {
-        "title": str(title),
-        "category": str(category),
-        "stack": str(stack),
-        "affix": str(affix),
-        "desc_html": str(desc_html),
-        "en": str(en),
-        "icon_url": str(icon_url),
-    }
-
-    # icon_url 优先使用传入的 icon_url，否则保留模板里的 img src（模板内已设置默认）
-    # 我们用 Template.safe_substitute 以避免未传入 key 抛错
-    t = Template(text)
-    rendered = t.safe_substitute(safe)
+    rendered = get_renderer(tmpl_path).render(
+        title=title,
+        category=category,
+        stack=stack,
+        affix=affix,
+        desc_html=desc_html,
+        en=en,
+        icon_url=icon_url,
+        sprite_class=sprite_class,
+    )
 
     outp = Path(out_path)
     outp.parent.mkdir(parents=True, exist_ok=True)
@@ -0,0 +1,212 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import re
+import sys
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Iterable, Optional, Union
+
+from tool.webp_to_png import PngOptions, _pil_image, _save_png
+
+
+PathLike = Union[str, os.PathLike]
+
+
+@dataclass(frozen=True)
+class SpriteRect:
+	"""一个图标在图集里的位置；sheet 为图集文件名。"""
+
+	key: str
+	css_class: str
+	sheet: str
+	x: int
+	y: int
+	w: int
+	h: int
+
+
+def pack_shelves(
+	sizes: dict[str, tuple[int, int]],
+	*,
+	max_size: int = 1024,
+	padding: int = 1,
+) -> list[list[tuple[str, int, int]]]:
+	"""按高度降序做货架式装箱（shelf / next-fit decreasing height）。
+
+	每张图集不超过 max_size 见方，装不下就开新图集；返回每张图集的 [(key, x, y), ...]。
+	"""
+	order = sorted(sizes, key=lambda k: (-sizes[k][1], -sizes[k][0], k))
+	sheets: list[list[tuple[str, int, int]]] = [[]]
+	x = y = shelf_h = 0
+	for key in order:
+		w, h = sizes[key]
+		if w > max_size or h > max_size:
+			raise ValueError(f"图标 {key} 尺寸 {w}x{h} 超过图集上限 {max_size}")
+		if x + w > max_size:
+			# 当前货架放不下：换到下一层
+			x, y, shelf_h = 0, y + shelf_h + padding, 0
+		if y + h > max_size:
+			sheets.append([])
+			x = y = shelf_h = 0
+		sheets[-1].append((key, x, y))
+		x += w + padding
+		shelf_h = max(shelf_h, h)
+	return [s for s in sheets if s]
+
+
+def css_class_for(key: str, prefix: str = "sprite-") -> str:
+	slug = re.sub(r"[^a-z0-9_-]+", "-", key.lower()).strip("-") or "icon"
+	return prefix + slug
+
+
+@dataclass
+class SpriteAtlas:
+	"""一组图集的布局：key（图标文件名去掉后缀）→ SpriteRect。
+
+	用法：
+		atlas = build_atlases(paths, "tmp/images/sprites")
+		css_class = atlas.class_for("CurrencyIdentification")
+	"""
+
+	name: str
+	rects: dict[str, SpriteRect]
+	sheet_sizes: dict[str, tuple[int, int]]
+	display_size: int = 44
+	url_prefix: str = ""
+
+	def class_for(self, key: str) -> Optional[str]:
+		rect = self.rects.get(key)
+		return None if rect is None else rect.css_class
+
+	def css(self) -> str:
+		"""生成 CSS：每个图标一个 class，按 display_size 等比缩放显示。"""
+		lines = [
+			".sprite {",
+			"  display: inline-block;",
+			"  background-repeat: no-repeat;",
+			"}",
+		]
+		for key in sorted(self.rects):
+			r = self.rects[key]
+			sw, sh = self.sheet_sizes[r.sheet]
+			scale = self.display_size / max(r.w, r.h)
+			lines.append(
+				f".{r.css_class} {{ width: {r.w * scale:g}px; height: {r.h * scale:g}px; "
+				f"background-image: url({self.url_prefix}{r.sheet}); "
+				f"background-position: {-r.x * scale:g}px {-r.y * scale:g}px; "
+				f"background-size: {sw * scale:g}px {sh * scale:g}px; }}"
+			)
+		return "\n".join(lines) + "\n"
+
+	def to_dict(self) -> dict:
+		return {
+			"name": self.name,
+			"display_size": self.display_size,
+			"url_prefix": self.url_prefix,
+			"sheets": {k: list(v) for k, v in self.sheet_sizes.items()},
+			"rects": {k: asdict(r) for k, r in self.rects.items()},
+		}
+
+	@classmethod
+	def load(cls, path: PathLike) -> "SpriteAtlas":
+		d = json.loads(Path(path).read_text(encoding="utf-8"))
+		return cls(
+			name=d["name"],
+			rects={k: SpriteRect(**r) for k, r in d["rects"].items()},
+			sheet_sizes={k: (v[0], v[1]) for k, v in d["sheets"].items()},
+			display_size=d["display_size"],
+			url_prefix=d["url_prefix"],
+		)
+
+
+def _collect_png(inputs: Iterable[PathLike]) -> list[Path]:
+	paths: list[Path] = []
+	for p in map(Path, inputs):
+		if p.is_dir():
+			paths.extend(sorted(p.glob("*.png")))
+		else:
+			paths.append(p)
+	return paths
+
+
+def build_atlases(
+	inputs: Iterable[PathLike],
+	output_dir: PathLike,
+	*,
+	name: str = "icons",
+	max_size: int = 1024,
+	padding: int = 1,
+	display_size: int = 44,
+	url_prefix: str = "",
+) -> SpriteAtlas:
+	"""把一组 PNG 图标装进若干张图集，写出 <name>-N.png、<name>.css 和 <name>.json。
+
+	inputs 可以是目录（取其中的 *.png）或文件路径；url_prefix 为图集上传后的地址前缀
+	（如 CDN 目录），CSS 里的 background-image 用它拼接图集文件名。
+	"""
+	Image = _pil_image()
+	output_dir = Path(output_dir)
+	output_dir.mkdir(parents=True, exist_ok=True)
+
+	paths = {p.stem: p for p in _collect_png(inputs)}
+	sizes: dict[str, tuple[int, int]] = {}
+	for key, p in paths.items():
+		with Image.open(p) as im:
+			sizes[key] = im.size
+
+	used: set[str] = set()
+	rects: dict[str, SpriteRect] = {}
+	sheet_sizes: dict[str, tuple[int, int]] = {}
+	for i, placements in enumerate(pack_shelves(sizes, max_size=max_size, padding=padding)):
+		sheet = f"{name}-{i}.png"
+		width = max(x + sizes[k][0] for k, x, _ in placements)
+		height = max(y + sizes[k][1] for k, _, y in placements)
+		canvas = Image.new("RGBA", (width, height), (0, 0, 0, 0))
+		for key, x, y in placements:
+			with Image.open(paths[key]) as im:
+				canvas.paste(im.convert("RGBA"), (x, y))
+			css_class = css_class_for(key)
+			n = 1
+			while css_class in used:
+				n += 1
+				css_class = f"{css_class_for(key)}-{n}"
+			used.add(css_class)
+			rects[key] = SpriteRect(key, css_class, sheet, x, y, *sizes[key])
+		_save_png(canvas, output_dir / sheet, PngOptions(optimize=True))
+		sheet_sizes[sheet] = (width, height)
+
+	atlas = SpriteAtlas(name, rects, sheet_sizes, display_size=display_size, url_prefix=url_prefix)
+	(output_dir / f"{name}.css").write_text(atlas.css(), encoding="utf-8")
+	(output_dir / f"{name}.json").write_text(json.dumps(atlas.to_dict(), ensure_ascii=False, indent=1), encoding="utf-8")
+	return atlas
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+	parser = argparse.ArgumentParser(description="把 PNG 图标打包成图集并生成 CSS")
+	parser.add_argument("inputs", nargs="*", default=["tmp/images/png"], help="PNG 文件或目录（默认 tmp/images/png）")
+	parser.add_argument("-o", "--output-dir", default="tmp/images/sprites", help="图集输出目录")
+	parser.add_argument("--name", default="icons", help="图集文件名前缀")
+	parser.add_argument("--max-size", type=int, default=1024, help="单张图集的最大边长")
+	parser.add_argument("--padding", type=int, default=1, help="图标间距（像素）")
+	parser.add_argument("--display-size", type=int, default=44, help="CSS 中图标显示的边长")
+	parser.add_argument("--url-prefix", default="", help="图集上传后的地址前缀")
+	args = parser.parse_args(argv)
+
+	atlas = build_atlases(
+		args.inputs,
+		args.output_dir,
+		name=args.name,
+		max_size=args.max_size,
+		padding=args.padding,
+		display_size=args.display_size,
+		url_prefix=args.url_prefix,
+	)
+	print(f"{len(atlas.rects)} 个图标 → {len(atlas.sheet_sizes)} 张图集：{', '.join(atlas.sheet_sizes)}")
+	return 0
+
+
+if __name__ == "__main__":
+	sys.exit(main())
@@ -1,14 +1,37 @@
 from __future__ import annotations
 
+import argparse
+import io
+import json
 import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Union
+from typing import Any, Iterable, Optional, Union
 
 
 PathLike = Union[str, os.PathLike]
 
+_Image: Any = None
 
-def convert_webp_to_png(webp_path: PathLike, output_dir: PathLike) -> str:
+
+def _pil_image() -> Any:
+	"""导入 PIL.Image（每个进程只导入一次）。"""
+	global _Image
+	if _Image is None:
+		try:
+			from PIL import Image
+		except ImportError as e:
+			raise ImportError(
+				"缺少依赖 Pillow，请先安装：pip install Pillow"
+			) from e
+		_Image = Image
+	return _Image
+
+
+def convert_webp_to_png(webp_path: PathLike, output_dir: PathLike, *, options: Optional[PngOptions] = None) -> str:
 	"""将 WebP 转换为 PNG，保留透明通道。
 
 	参数：
@@ -22,8 +45,12 @@ def convert_webp_to_png(webp_path: PathLike, output_dir: PathLike) -> str:
 		- 若 webp 包含 alpha，会以 RGBA 保存。
 		- 若不包含 alpha，会以 RGB 保存。
 		- 会自动创建输出目录。
+		- options 控制压缩/量化（见 PngOptions），默认与 Pillow 默认设置一致。
 	"""
+	return _convert_file(webp_path, output_dir, options).path
+
 
+def _convert_file(webp_path: PathLike, output_dir: PathLike, options: Optional[PngOptions]) -> PngStats:
 	webp_path = Path(webp_path)
 	output_dir = Path(output_dir)
 
@@ -33,31 +60,471 @@ def convert_webp_to_png(webp_path: PathLike, output_dir: PathLike) -> str:
 	output_dir.mkdir(parents=True, exist_ok=True)
 	output_png_path = output_dir / f"{webp_path.stem}.png"
 
-	try:
-		from PIL import Image
-	except ImportError as e:
-		raise ImportError(
-			"缺少依赖 Pillow，请先安装：pip install Pillow"
-		) from e
+	Image = _pil_image()
 
 	# 打开 WebP
 	with Image.open(webp_path) as im:
-		# 有些 WebP 会是 P 模式/LA 等，这里统一转换以确保保存时带 alpha
-		has_alpha = (
-			(im.mode in ("RGBA", "LA"))
-			or ("transparency" in getattr(im, "info", {}))
-		)
-		im_converted = im.convert("RGBA" if has_alpha else "RGB")
+		stats = _save_png(im, output_png_path, options)
+
+	stats.path = str(output_png_path.resolve())
+	return stats
+
+
+@dataclass(frozen=True)
+class PngOptions:
+	"""PNG 输出参数。默认等同 Pillow 的默认设置；optimized() 是体积优先的预设。
+
+	- optimize: 无损最大压缩（optimize=True, compress_level=9）
+	- quantize_colors: >0 时尝试量化成该颜色数的调色板（保留 alpha）
+	- max_error: 量化误差上限（0-255）：只看可见像素，按 alpha 预乘后取每个像素的最大通道误差，
+	  其 error_percentile 分位数不超过它才采用量化结果，否则保持无损
+	- measure: 额外按默认设置编码一次，记录优化前的字节数用于报告
+	"""
+
+	optimize: bool = False
+	quantize_colors: int = 0
+	max_error: float = 8.0
+	error_percentile: float = 99.0
+	measure: bool = False
+
+	@classmethod
+	def optimized(cls, *, quantize_colors: int = 256, max_error: float = 8.0) -> "PngOptions":
+		return cls(optimize=True, quantize_colors=quantize_colors, max_error=max_error, measure=True)
+
+
+@dataclass
+class PngStats:
+	"""单张 PNG 的输出统计；before_bytes 为默认设置下的大小（未测量时等于 after_bytes）。"""
+
+	path: str
+	before_bytes: int
+	after_bytes: int
+	quantized: bool = False
+
+
+def _encode_png(im: Any, **kwargs: Any) -> bytes:
+	buf = io.BytesIO()
+	im.save(buf, format="PNG", **kwargs)
+	return buf.getvalue()
+
+
+def _premultiplied(im: Any) -> list[Any]:
+	"""RGBA/RGB 图的各通道（RGB 按 alpha 预乘）；全透明像素的颜色不影响结果。"""
+	from PIL import ImageChops
+
+	if im.mode != "RGBA":
+		return list(im.split())
+	r, g, b, a = im.split()
+	return [ImageChops.multiply(c, a) for c in (r, g, b)] + [a]
+
+
+def _visible_error(original: Any, quantized: Any, percentile: float) -> float:
+	"""量化误差：可见像素上每个像素的最大通道误差（按 alpha 预乘），取 percentile 分位数。
+
+	只统计量化前后任一方不透明度 > 0 的像素，大片透明背景既不会抬高也不会稀释误差。
+	"""
+	from PIL import ImageChops
+
+	diffs = [ImageChops.difference(x, y) for x, y in zip(_premultiplied(original), _premultiplied(quantized))]
+	worst = diffs[0]
+	for d in diffs[1:]:
+		worst = ImageChops.lighter(worst, d)
+	mask = None
+	if original.mode == "RGBA":
+		alpha = ImageChops.lighter(original.getchannel("A"), quantized.getchannel("A"))
+		mask = alpha.point(lambda v: 255 if v else 0)
+	hist = worst.histogram(mask)
+	total = sum(hist)
+	if total == 0:
+		return 0.0
+	threshold = total * percentile / 100
+	seen = 0
+	for value, n in enumerate(hist):
+		seen += n
+		if seen >= threshold:
+			return float(value)
+	return 255.0
+
+
+def _quantize_within(im: Any, colors: int, max_error: float, percentile: float = 99.0) -> Any:
+	"""量化为调色板图；可见像素误差（见 _visible_error）超过 max_error 时返回 None。"""
+	Image = _pil_image()
+
+	# FASTOCTREE 支持 RGBA，量化后的调色板带 alpha（保存时写 tRNS）
+	method = getattr(getattr(Image, "Quantize", None), "FASTOCTREE", 2)
+	quantized = im.quantize(colors=colors, method=method)
+	error = _visible_error(im, quantized.convert(im.mode), percentile)
+	return quantized if error <= max_error else None
+
+
+def _save_png(im: Any, output_png_path: PathLike, options: Optional[PngOptions] = None) -> PngStats:
+	# 有些 WebP 会是 P 模式/LA 等，这里统一转换以确保保存时带 alpha
+	has_alpha = (
+		(im.mode in ("RGBA", "LA"))
+		or ("transparency" in getattr(im, "info", {}))
+	)
+	im_converted = im.convert("RGBA" if has_alpha else "RGB")
+	output_png_path = Path(output_png_path)
+
+	if options is None or options == PngOptions():
 		im_converted.save(output_png_path, format="PNG")
+		size = output_png_path.stat().st_size
+		return PngStats(str(output_png_path), size, size)
+
+	save_kwargs: dict[str, Any] = {"optimize": True, "compress_level": 9} if options.optimize else {}
+	best = _encode_png(im_converted, **save_kwargs)
+	quantized = False
+	if options.quantize_colors > 0:
+		q = _quantize_within(im_converted, options.quantize_colors, options.max_error, options.error_percentile)
+		if q is not None:
+			data = _encode_png(q, **save_kwargs)
+			if len(data) < len(best):
+				best, quantized = data, True
+	before = len(_encode_png(im_converted)) if options.measure else len(best)
+	output_png_path.write_bytes(best)
+	return PngStats(str(output_png_path), before, len(best), quantized)
+
+
+def convert_webp_bytes_to_png(data: bytes, output_png_path: PathLike, *, options: Optional[PngOptions] = None) -> str:
+	"""把内存里的 WebP 字节直接解码并保存为 PNG（不落地中间的 WebP 文件）。
+
+	返回输出 png 的绝对路径；透明通道处理与 convert_webp_to_png 相同。
+	"""
+	output_png_path = Path(output_png_path)
+	output_png_path.parent.mkdir(parents=True, exist_ok=True)
+
+	Image = _pil_image()
+	with Image.open(io.BytesIO(data)) as im:
+		_save_png(im, output_png_path, options)
 
 	return str(output_png_path.resolve())
 
 
+def _png_path(webp_path: Path, output_dir: Path) -> Path:
+	return output_dir / f"{webp_path.stem}.png"
 
-if __name__ == "__main__":
-	# Windows 路径建议用 Path 或 raw string，避免反斜杠转义
-	out = convert_webp_to_png(
-		"Artwork/Icon/webp/CurrencyIdentification.webp",
-		"Artwork/Icon/png",
+
+def _is_up_to_date(webp_path: Path, png_path: Path) -> bool:
+	try:
+		return png_path.stat().st_mtime >= webp_path.stat().st_mtime
+	except FileNotFoundError:
+		return False
+
+
+def _collect_webp(inputs: Iterable[PathLike]) -> list[Path]:
+	paths: list[Path] = []
+	for p in map(Path, inputs):
+		if p.is_dir():
+			paths.extend(sorted(p.glob("*.webp")))
+		else:
+			paths.append(p)
+	return paths
+
+
+def _convert_worker(args: tuple[str, str, Optional[PngOptions]]) -> tuple[str, Optional[PngStats], Optional[str]]:
+	# 在子进程里执行：异常转成字符串返回，避免不可 pickle 的异常拖垮整个批次
+	webp_path, output_dir, options = args
+	try:
+		return webp_path, _convert_file(webp_path, output_dir, options), None
+	except Exception as e:
+		return webp_path, None, f"{type(e).__name__}: {e}"
+
+
+@dataclass
+class ConvertReport:
+	"""批量转换的统计：converted/skipped 为输出路径，failed 为 (输入路径, 错误)。"""
+
+	converted: list[str] = field(default_factory=list)
+	skipped: list[str] = field(default_factory=list)
+	failed: list[tuple[str, str]] = field(default_factory=list)
+	input_bytes: int = 0
+	png_bytes_before: int = 0
+	png_bytes_after: int = 0
+	quantized: int = 0
+	elapsed_s: float = 0.0
+	workers: int = 1
+
+	def summary(self) -> str:
+		n = len(self.converted)
+		rate = n / self.elapsed_s if self.elapsed_s else 0.0
+		mb_s = self.input_bytes / 1e6 / self.elapsed_s if self.elapsed_s else 0.0
+		text = (
+			f"转换 {n}，跳过 {len(self.skipped)}，失败 {len(self.failed)}；"
+			f"{self.elapsed_s:.2f}s，{rate:.1f} 张/s，{mb_s:.2f} MB/s（{self.workers} 进程）"
+		)
+		if self.png_bytes_before != self.png_bytes_after:
+			saved = self.png_bytes_before - self.png_bytes_after
+			pct = saved * 100 / self.png_bytes_before if self.png_bytes_before else 0.0
+			text += (
+				f"\nPNG 体积 {self.png_bytes_before / 1e3:.1f} KB → {self.png_bytes_after / 1e3:.1f} KB，"
+				f"节省 {saved / 1e3:.1f} KB（{pct:.1f}%），量化 {self.quantized} 张"
+			)
+		return text
+
+
+def convert_many(
+	inputs: Iterable[PathLike],
+	output_dir: PathLike,
+	*,
+	workers: Optional[int] = None,
+	force: bool = False,
+	chunksize: int = 8,
+	options: Optional[PngOptions] = None,
+) -> ConvertReport:
+	"""批量把 WebP 转成 PNG，分发到进程池（默认进程数 = CPU 核数）。
+
+	inputs 可以是目录（取其中的 *.webp）或文件路径；PNG 比 WebP 新时跳过（force=True 则全部重转）。
+	options 为 PngOptions.optimized() 之类的体积优化参数时，报告里带优化前后的字节数。
+	"""
+	started = time.perf_counter()
+	output_dir = Path(output_dir)
+	report = ConvertReport(workers=workers or os.cpu_count() or 1)
+
+	todo: list[tuple[str, str, Optional[PngOptions]]] = []
+	for webp in _collect_webp(inputs):
+		png = _png_path(webp, output_dir)
+		if not force and _is_up_to_date(webp, png):
+			report.skipped.append(str(png.resolve()))
+			continue
+		todo.append((str(webp), str(output_dir), options))
+
+	if todo:
+		report.input_bytes = sum(os.path.getsize(p) for p, _, _ in todo if os.path.exists(p))
+		report.workers = min(report.workers, len(todo))
+		if report.workers == 1:
+			_collect_results(report, map(_convert_worker, todo))
+		else:
+			with ProcessPoolExecutor(max_workers=report.workers) as pool:
+				_collect_results(report, pool.map(_convert_worker, todo, chunksize=max(1, chunksize)))
+
+	report.elapsed_s = time.perf_counter() - started
+	return report
+
+
+def _collect_results(
+	report: ConvertReport, results: Iterable[tuple[str, Optional[PngStats], Optional[str]]]
+) -> None:
+	for webp_path, stats, error in results:
+		if stats is None:
+			report.failed.append((webp_path, error or ""))
+			continue
+		report.converted.append(stats.path)
+		report.png_bytes_before += stats.before_bytes
+		report.png_bytes_after += stats.after_bytes
+		report.quantized += stats.quantized
+
+
+@dataclass(frozen=True)
+class Variant:
+	"""一个输出变体：尺寸（scale 或 max_size）+ 格式（png/webp）+ 质量。
+
+	文件名为 "<stem>@<name>.<format>"；max_size > 0 时等比缩放到不超过 max_size 见方（优先于 scale），
+	不会放大超过 scale 指定的尺寸。webp 用 quality/lossless，png 用 png_options。
+	"""
+
+	name: str
+	format: str = "png"
+	scale: float = 1.0
+	max_size: int = 0
+	quality: int = 85
+	lossless: bool = False
+	png_options: Optional[PngOptions] = None
+
+	def filename(self, stem: str) -> str:
+		return f"{stem}@{self.name}.{self.format}"
+
+	def target_size(self, width: int, height: int) -> tuple[int, int]:
+		w, h = width * self.scale, height * self.scale
+		if self.max_size > 0 and max(w, h) > self.max_size:
+			ratio = self.max_size / max(w, h)
+			w, h = w * ratio, h * ratio
+		return max(1, round(w)), max(1, round(h))
+
+	@classmethod
+	def parse(cls, spec: str) -> "Variant":
+		"""解析命令行写法，如 "name=thumb,max_size=32" 或 "name=webp,format=webp,quality=80"。"""
+		kwargs: dict[str, Any] = {}
+		for part in filter(None, (p.strip() for p in spec.split(","))):
+			key, _, value = part.partition("=")
+			if key == "scale":
+				kwargs[key] = float(value)
+			elif key in ("max_size", "quality"):
+				kwargs[key] = int(value)
+			elif key == "lossless":
+				kwargs[key] = value.lower() in ("1", "true", "yes")
+			elif key == "optimize":
+				kwargs["png_options"] = PngOptions.optimized() if value.lower() in ("1", "true", "yes") else None
+			elif key in ("name", "format"):
+				kwargs[key] = value.lower() if key == "format" else value
+			else:
+				raise ValueError(f"未知的变体参数: {key}（{spec}）")
+		if "name" not in kwargs:
+			raise ValueError(f"变体缺少 name: {spec}")
+		if kwargs.get("format", "png") not in ("png", "webp"):
+			raise ValueError(f"不支持的格式: {kwargs['format']}（{spec}）")
+		return cls(**kwargs)
+
+
+DEFAULT_VARIANTS: tuple[Variant, ...] = (
+	Variant("1x", png_options=PngOptions(optimize=True)),
+	Variant("thumb", max_size=32, png_options=PngOptions(optimize=True)),
+	Variant("webp", format="webp", quality=85),
+)
+
+
+def generate_variants(
+	source: Union[PathLike, bytes],
+	output_dir: PathLike,
+	variants: Iterable[Variant] = DEFAULT_VARIANTS,
+	*,
+	stem: Optional[str] = None,
+) -> dict[str, dict[str, Any]]:
+	"""只解码一次源图，在同一轮里写出全部变体，返回 {变体名: {path, width, height, bytes}}。
+
+	source 可以是文件路径或内存里的字节（此时必须传 stem）；相同尺寸的变体共用一次缩放结果。
+	"""
+	if isinstance(source, bytes):
+		if not stem:
+			raise ValueError("source 为字节时必须指定 stem")
+		fp: Any = io.BytesIO(source)
+	else:
+		fp = Path(source)
+		stem = stem or fp.stem
+	output_dir = Path(output_dir)
+	output_dir.mkdir(parents=True, exist_ok=True)
+
+	Image = _pil_image()
+	resample = getattr(getattr(Image, "Resampling", Image), "LANCZOS")
+	out: dict[str, dict[str, Any]] = {}
+	with Image.open(fp) as im:
+		has_alpha = (im.mode in ("RGBA", "LA")) or ("transparency" in getattr(im, "info", {}))
+		base = im.convert("RGBA" if has_alpha else "RGB")
+	resized: dict[tuple[int, int], Any] = {base.size: base}
+	for v in variants:
+		size = v.target_size(*base.size)
+		if size not in resized:
+			resized[size] = base.resize(size, resample)
+		img = resized[size]
+		path = output_dir / v.filename(stem)
+		if v.format == "webp":
+			img.save(path, format="WEBP", quality=v.quality, lossless=v.lossless, method=6)
+		else:
+			_save_png(img, path, v.png_options)
+		out[v.name] = {"path": str(path.resolve()), "width": size[0], "height": size[1], "bytes": path.stat().st_size}
+	return out
+
+
+def _variants_worker(
+	args: tuple[str, str, tuple[Variant, ...]]
+) -> tuple[str, Optional[dict[str, dict[str, Any]]], Optional[str]]:
+	source, output_dir, variants = args
+	try:
+		return source, generate_variants(source, output_dir, variants), None
+	except Exception as e:
+		return source, None, f"{type(e).__name__}: {e}"
+
+
+def generate_variants_many(
+	inputs: Iterable[PathLike],
+	output_dir: PathLike,
+	variants: Iterable[Variant] = DEFAULT_VARIANTS,
+	*,
+	workers: Optional[int] = None,
+	force: bool = False,
+	chunksize: int = 8,
+	manifest_path: Optional[PathLike] = None,
+) -> ConvertReport:
+	"""批量生成变体（进程池），并把 {stem: {变体名: 文件信息}} 合并写入清单。
+
+	清单默认为 output_dir/manifest.json，路径记为相对 output_dir 的文件名；
+	某个源的所有变体都比源文件新时跳过（force=True 则全部重新生成）。
+	"""
+	started = time.perf_counter()
+	variants = tuple(variants)
+	output_dir = Path(output_dir)
+	output_dir.mkdir(parents=True, exist_ok=True)
+	manifest_path = Path(manifest_path) if manifest_path is not None else output_dir / "manifest.json"
+	manifest: dict[str, Any] = {}
+	if manifest_path.exists():
+		manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+	report = ConvertReport(workers=workers or os.cpu_count() or 1)
+
+	todo: list[tuple[str, str, tuple[Variant, ...]]] = []
+	for src in _collect_webp(inputs):
+		targets = [output_dir / v.filename(src.stem) for v in variants]
+		if not force and src.stem in manifest and all(_is_up_to_date(src, t) for t in targets):
+			report.skipped.extend(str(t.resolve()) for t in targets)
+			continue
+		todo.append((str(src), str(output_dir), variants))
+
+	if todo:
+		report.input_bytes = sum(os.path.getsize(p) for p, _, _ in todo if os.path.exists(p))
+		report.workers = min(report.workers, len(todo))
+		if report.workers == 1:
+			_collect_variants(report, manifest, map(_variants_worker, todo))
+		else:
+			with ProcessPoolExecutor(max_workers=report.workers) as pool:
+				_collect_variants(report, manifest, pool.map(_variants_worker, todo, chunksize=max(1, chunksize)))
+
+	tmp = manifest_path.with_name(manifest_path.name + ".tmp")
+	tmp.write_text(json.dumps(manifest, ensure_ascii=False, indent=1, sort_keys=True), encoding="utf-8")
+	os.replace(tmp, manifest_path)
+	report.elapsed_s = time.perf_counter() - started
+	return report
+
+
+def _collect_variants(
+	report: ConvertReport,
+	manifest: dict[str, Any],
+	results: Iterable[tuple[str, Optional[dict[str, dict[str, Any]]], Optional[str]]],
+) -> None:
+	for source, files, error in results:
+		if files is None:
+			report.failed.append((source, error or ""))
+			continue
+		entry = {}
+		for name, info in files.items():
+			report.converted.append(info["path"])
+			entry[name] = {**info, "path": Path(info["path"]).name}
+		manifest[Path(source).stem] = entry
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+	parser = argparse.ArgumentParser(description="批量把 WebP 转成 PNG（多进程）")
+	parser.add_argument("inputs", nargs="*", default=["tmp/images/webp"], help="WebP 文件或目录（默认 tmp/images/webp）")
+	parser.add_argument("-o", "--output-dir", default="tmp/images/png", help="PNG 输出目录")
+	parser.add_argument("-j", "--workers", type=int, default=None, help="进程数（默认 CPU 核数）")
+	parser.add_argument("--force", action="store_true", help="忽略时间戳，全部重新转换")
+	parser.add_argument("--optimize", action="store_true", help="体积优先：无损最大压缩，并报告优化前后字节数")
+	parser.add_argument("--quantize", type=int, default=0, metavar="N", help="配合 --optimize：尝试量化为 N 色调色板")
+	parser.add_argument(
+		"--max-error", type=float, default=8.0,
+		help="量化允许的误差（0-255）：可见像素按 alpha 预乘后最大通道误差的 99 分位数",
 	)
-	print(out)
+	parser.add_argument("--variants", action="store_true", help="按默认变体（1x/thumb/webp）一次解码生成多个输出")
+	parser.add_argument(
+		"--variant", action="append", default=[], metavar="SPEC",
+		help='自定义变体，可重复，如 "name=2x,scale=2" 或 "name=webp,format=webp,quality=80"',
+	)
+	args = parser.parse_args(argv)
+
+	if args.variants or args.variant:
+		variants = tuple(Variant.parse(spec) for spec in args.variant) or DEFAULT_VARIANTS
+		report = generate_variants_many(args.inputs, args.output_dir, variants, workers=args.workers, force=args.force)
+		print(report.summary())
+		for source, error in report.failed[:20]:
+			print(f"  失败: {source}: {error}")
+		return 1 if report.failed else 0
+
+	options = None
+	if args.optimize:
+		options = PngOptions.optimized(quantize_colors=args.quantize, max_error=args.max_error)
+	report = convert_many(args.inputs, args.output_dir, workers=args.workers, force=args.force, options=options)
+	print(report.summary())
+	for webp_path, error in report.failed[:20]:
+		print(f"  失败: {webp_path}: {error}")
+	return 1 if report.failed else 0
+
+
+if __name__ == "__main__":
+	sys.exit(main())